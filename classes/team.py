@@ -6,3 +6,6 @@ class Team:
         self.traded_player_exception = int()
         self.taxPaying               = False
         self.draftPicks              = list()
+        self.payroll                 = int()
+        self.midLevelExceptionUsed   = int()
+        self.biAnnualExceptionUsed   = int()
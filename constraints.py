@@ -0,0 +1,243 @@
+'''
+Description:
+    - CBA rules compiled for a season into vectorized predicates over a batch of trade proposals
+    - A batch is resolved once into integer move arrays (trade_screening.encode_proposals) and flattened
+      into one row per (proposal, team involved) with numpy arrays for the outgoing/incoming salary,
+      post-trade payroll and roster size, tax flag and hard cap flag
+    - Every rule is a single array expression over those rows, so checking another rule costs one more
+      vector operation for the whole batch instead of another pass over the proposals
+
+Rules:
+    - salary_matching: incoming salary (minus players absorbed with the minimum salary exception) must fit
+      the evaluate_*_team_limit of the outgoing salary, unless the team stays under the cap after the trade.
+      Teams over the luxury tax after the trade get the tax paying limit
+    - roster_max / roster_min: post-trade roster size limits
+    - hard_cap: teams that used the bi-annual exception or more than the taxpayer mid-level exception
+      cannot go over the tax apron
+    - exception_usage: recorded mid-level/bi-annual usage cannot exceed the season's exception amounts
+
+Notes:
+    - The minimum salary exception lets a team acquire a player on a minimum contract of up to two years
+      without matching salary. Payroll tables do not record years of service or contract types, so a
+      contract counts as a minimum contract when its salary is exactly one of the season's minimum salaries.
+      Only 2020-21 (and 2019-20, whose scale it kept) has a minimum salary scale; other seasons absorb nothing
+    - The room exception does not trigger a hard cap, so it only matters through the salary cap check
+    - Exception usage comes from the MidLevelExceptionUsed/BiAnnualExceptionUsed columns of the cap overview
+      (see trade_simulation.determine_tax_paying_teams); teams without them are never hard-capped
+
+Example:
+    rules = compile_rules("2020-21")
+    rules.check(matrix, [{"players": ["Spencer Dinwiddie"], "src": ["BRK"], "dest": ["HOU"]}])
+'''
+
+import numpy as np
+from enums.bi_annual_exception import BiAnnualException
+from enums.mid_level_exceptions import MidLevelExceptionNonTaxPayer
+from enums.mid_level_exceptions import MidLevelExceptionTaxPayer
+from enums.minimum_salaries import MinimumSalaries
+from enums.salary_cap import LuxuryTax
+from enums.salary_cap import SalaryCap
+from enums.salary_cap import TaxApron
+from helpers import trade_utils as utils
+from trade_screening import ScreenedTrades
+from trade_screening import encode_proposals
+from trade_screening import salary_matching_limits
+from trade_screening import team_rows
+
+
+ROSTER_MAX = 15
+ROSTER_MIN = 13    # Teams may carry 13 players for up to two weeks after a trade
+
+MINIMUM_CONTRACT_YEARS = 2
+
+# Season of the MinimumSalaries scale (one figure per years of service)
+MINIMUM_SALARY_SEASON = "2020-21"
+
+
+def matching_tax_paying(rows: dict, constants: dict) -> np.ndarray:
+    """Tax flag used for salary matching: tax paying teams and teams the trade takes over the luxury tax."""
+    return rows["tax_paying"] | (rows["payroll_after"] > constants["luxury_tax"])
+
+
+def matching_limits(rows: dict, constants: dict) -> np.ndarray:
+    """Salary matching limit of every row."""
+    return salary_matching_limits(rows["outgoing"], matching_tax_paying(rows, constants))
+
+
+def salary_matching(rows: dict, constants: dict) -> np.ndarray:
+    """Incoming salary fits the matching limit, or the team stays under the cap."""
+    limit = matching_limits(rows, constants)
+    return (rows["incoming_matched"] <= limit) | (rows["payroll_after"] <= constants["salary_cap"])
+
+
+def roster_max(rows: dict, constants: dict) -> np.ndarray:
+    """Roster is not over the maximum after the trade."""
+    return rows["roster_after"] <= constants["roster_max"]
+
+
+def roster_min(rows: dict, constants: dict) -> np.ndarray:
+    """Roster is not under the minimum after the trade."""
+    return rows["roster_after"] >= constants["roster_min"]
+
+
+def hard_cap(rows: dict, constants: dict) -> np.ndarray:
+    """Hard-capped teams stay under the tax apron after the trade."""
+    return ~rows["hard_capped"] | (rows["payroll_after"] <= constants["tax_apron"])
+
+
+def exception_usage(rows: dict, constants: dict) -> np.ndarray:
+    """Recorded exception usage fits the season's mid-level and bi-annual exceptions."""
+    return (rows["mle_used"] <= constants["mid_level_non_tax_payer"]) & (rows["bae_used"] <= constants["bi_annual"])
+
+
+RULES = [
+    ("salary_matching", salary_matching, "Incoming salary exceeds the salary matching limit"),
+    ("roster_max",      roster_max,      "Roster would exceed {} players".format(ROSTER_MAX)),
+    ("roster_min",      roster_min,      "Roster would drop below {} players".format(ROSTER_MIN)),
+    ("hard_cap",        hard_cap,        "Hard-capped team would exceed the tax apron"),
+    ("exception_usage", exception_usage, "Recorded exception usage exceeds the season's exception amounts"),
+]
+
+
+class ConstraintSet:
+    """CBA rules compiled for one season.
+
+    Attributes:
+        season (str): Season year the rules were compiled for.
+        constants (dict): Cap, tax, apron, exception and roster figures of the season.
+        rules (list): (name, predicate, message) tuples. Predicates are module-level functions so
+            a ConstraintSet can be sent to pool workers.
+    """
+
+    def __init__(self, season: str, constants: dict, rules: list):
+        self.season    = season
+        self.constants = constants
+        self.rules     = list(rules)
+
+    def flatten_moves(self, matrix, moves: dict) -> dict:
+        """Flatten encoded moves into one row per (proposal, team involved).
+
+        Parameters:
+            matrix (trade_screening.LeagueMatrix): League to evaluate against.
+            moves (dict): Move arrays from trade_screening.encode_proposals.
+
+        Returns:
+            dict: Row arrays.
+        """
+        rows, _, in_rows = team_rows(matrix, moves)
+
+        salary = matrix.salaries[moves["row"], 0]
+        years  = np.count_nonzero(matrix.salaries[moves["row"]], axis=1)
+        minimum_contract = np.isin(salary, self.constants["minimum_salaries"]) & (years <= self.constants["minimum_contract_years"])
+
+        teams = rows["team"]
+        hard_capped = (matrix.bae_used > 0) | (matrix.mle_used > self.constants["mid_level_tax_payer"])
+
+        rows["incoming_matched"] = np.bincount(in_rows, weights=np.where(minimum_contract, 0, salary),
+                                               minlength=len(teams)).astype(np.int64)
+        rows["hard_capped"] = hard_capped[teams]
+        rows["mle_used"]    = matrix.mle_used[teams]
+        rows["bae_used"]    = matrix.bae_used[teams]
+
+        return rows
+
+    def flatten(self, matrix, proposals: list) -> tuple:
+        """Flatten a batch of proposals into one row per (proposal, team involved).
+
+        Returns:
+            tuple: Dict of row arrays, list of error messages per proposal.
+        """
+        moves, errors = encode_proposals(matrix, proposals)
+        return self.flatten_moves(matrix, moves), errors
+
+    def evaluate(self, matrix, moves: dict) -> tuple:
+        """Check encoded moves against every rule in one pass.
+
+        Parameters:
+            matrix (trade_screening.LeagueMatrix): League to evaluate against.
+            moves (dict): Move arrays from trade_screening.encode_proposals.
+
+        Returns:
+            tuple: Dict of trade_screening.TEAM_COLUMNS arrays (salary matching limit and tax flag, and
+                whether the team passes every rule), dict of "row"/"rule" arrays of every violation.
+        """
+        rows = self.flatten_moves(matrix, moves)
+
+        passed = np.ones(len(rows["team"]), dtype=bool)
+        violation_rows, violation_rules = list(), list()
+        for index, (name, predicate, message) in enumerate(self.rules):
+            result = predicate(rows, self.constants)
+            passed &= result
+
+            failed = np.flatnonzero(~result)
+            violation_rows.append(failed)
+            violation_rules.append(np.full(len(failed), index, dtype=np.int64))
+
+        teams = {
+            "proposal":  rows["proposal"],
+            "team":      rows["team"],
+            "outgoing":  rows["outgoing"],
+            "incoming":  rows["incoming"],
+            "limit":     matching_limits(rows, self.constants),
+            "taxPaying": matching_tax_paying(rows, self.constants),
+            "legal":     passed,
+        }
+        violations = {"row": np.concatenate(violation_rows or [np.array(list(), dtype=np.int64)]),
+                      "rule": np.concatenate(violation_rules or [np.array(list(), dtype=np.int64)])}
+
+        return teams, violations
+
+    def check(self, matrix, proposals: list) -> list:
+        """Check a batch of proposals against every rule in one pass.
+
+        Parameters:
+            matrix (trade_screening.LeagueMatrix): League to evaluate against.
+            proposals (list): Trade proposals.
+
+        Returns:
+            list: {"legal": bool, "teams": [...], "violations": [{"team", "rule", "message"}], "errors": [...]}
+                per proposal. "teams" lists, for every team involved, its outgoing and incoming salary,
+                salary matching limit and tax flag, and whether it passes every rule.
+        """
+        moves, errors = encode_proposals(matrix, proposals)
+        teams, violations = self.evaluate(matrix, moves)
+
+        results = ScreenedTrades(matrix, range(len(proposals)), moves, errors, teams, violations, self)
+        return [{key: result[key] for key in ("legal", "teams", "violations", "errors")} for result in results]
+
+
+def minimum_salaries(season: str) -> np.ndarray:
+    """Returns the minimum salary of every years-of-service tier of a season (empty when there is no scale)."""
+    if utils.SEASON_ALIASES.get(season, season) != MINIMUM_SALARY_SEASON:
+        return np.array(list(), dtype=np.int64)
+
+    return np.array([salary.value for salary in MinimumSalaries], dtype=np.int64)
+
+
+def compile_rules(season: str, rules: list = None) -> ConstraintSet:
+    """Compile the CBA rules of a season.
+
+    Parameters:
+        season (str): Season year (e.g. "2020-21").
+        rules (list): (name, predicate, message) tuples. Defaults to RULES.
+
+    Returns:
+        ConstraintSet: Rules ready to check proposals with.
+
+    Raises:
+        ValueError: If the enums have no cap, tax or exception figures for the season.
+    """
+    constants = {
+        "salary_cap":              utils.get_season_value(SalaryCap, season),
+        "luxury_tax":              utils.get_season_value(LuxuryTax, season),
+        "tax_apron":               utils.get_season_value(TaxApron, season),
+        "mid_level_non_tax_payer": utils.get_season_value(MidLevelExceptionNonTaxPayer, season),
+        "mid_level_tax_payer":     utils.get_season_value(MidLevelExceptionTaxPayer, season),
+        "bi_annual":               utils.get_season_value(BiAnnualException, season),
+        "minimum_salaries":        minimum_salaries(season),
+        "minimum_contract_years":  MINIMUM_CONTRACT_YEARS,
+        "roster_max":              ROSTER_MAX,
+        "roster_min":              ROSTER_MIN,
+    }
+
+    return ConstraintSet(season, constants, RULES if rules is None else rules)
@@ -2,32 +2,40 @@
 Description:
     - Steps to follow: https://docs.microsoft.com/en-us/sql/connect/python/pyodbc/python-sql-driver-pyodbc?view=sql-server-ver15
     - Connect to Azure SQL Database: https://docs.microsoft.com/en-us/azure/azure-sql/database/connect-query-python?tabs=windows 
+    - Timeouts, retries and the local store fallback are handled in db/resilience.py
 """
 import pandas as pd
-import pyodbc
-import os
+from db import resilience
 
 
 def connect(playerDB=None):
-    # Database Credentials
-    server   = os.getenv('azureServer')
-    database = os.getenv('azureDBPlayer') if playerDB else os.getenv('azureDBTeam')
-    username = os.getenv('azureDBUsername')
-    password = os.getenv('azureDBPswd')
-    driver   = '{ODBC Driver 17 for SQL Server}'
-
-    # Connect to Database
-    cnxn = pyodbc.connect('DRIVER='+driver+';      \
-                           SERVER='+server+';      \
-                           PORT=1433;              \
-                           DATABASE='+database+';  \
-                           UID='+username+';       \
-                           PWD='+ password)
-    return cnxn
+    # Connect to Database (credentials come from the environment)
+    return resilience.connect('azureDBPlayer' if playerDB else 'azureDBTeam')
 
 
 def read(schema, table):
-    cnxn = connect()
 
-    # Get All Columns from Database Table
-    return pd.read_sql_query('''SELECT * FROM [{}].[{}]'''.format(schema, table), cnxn)
+    def read_all():
+        cnxn = connect()
+
+        # Get All Columns from Database Table
+        try:
+            return pd.read_sql_query('''SELECT * FROM [{}].[{}]'''.format(schema, table), cnxn)
+        finally:
+            cnxn.close()
+
+    return resilience.read_table(read_all, schema, table)
+
+
+def query(sql, params=None):
+
+    def run():
+        cnxn = connect()
+
+        # Run a parameterized query ("?" placeholders)
+        try:
+            return pd.read_sql_query(sql, cnxn, params=params)
+        finally:
+            cnxn.close()
+
+    return resilience.call(run)
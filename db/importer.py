@@ -0,0 +1,115 @@
+'''
+Description:
+    - Bulk import of CSV/Excel payroll exports into the local columnar store
+    - Files must have the same columns as the Azure SQL tables:
+          + [Players].[Payroll{season}]
+          + [Teams].[SalaryCapOverview{season}]
+          + [Draft].[FuturePicks]
+    - Currency strings ("$1,234,567") are converted to integers once here so later reads skip the cleaning.
+      "Guaranteed" and season columns are converted even without "$", as Excel exports store them as plain numbers
+
+Example:
+    python3 -m db.importer payroll_2020-21.csv --schema Players --table Payroll2020-21
+    python3 -m db.importer east.xlsx west.xlsx --schema Players --table Payroll2020-21 --sheet 1
+'''
+import argparse
+import datetime
+import os
+import pandas as pd
+from db import local_store
+from helpers import trade_utils as utils
+
+
+def read_file(path: str, sheet=0) -> pd.DataFrame:
+    """Read a CSV or Excel export as strings.
+
+    Parameters:
+        path (str): Path to a ".csv", ".xls" or ".xlsx" file.
+        sheet: Excel sheet name or index. Ignored for CSV files.
+
+    Returns:
+        pd.DataFrame: File contents.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".csv":
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    elif extension in (".xls", ".xlsx"):
+        return pd.read_excel(path, sheet_name=sheet, dtype=str, keep_default_na=False)
+
+    raise ValueError("Unsupported file type: {}".format(path))
+
+
+def normalize_currency_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert every currency column of a DataFrame to integers.
+
+    Parameters:
+        df (pd.DataFrame): Raw export.
+
+    Returns:
+        pd.DataFrame: Copy of the export with currency columns as integers.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if utils.is_currency_column(df[column], require_dollar=not utils.is_money_column(column)):
+            df[column] = utils.clean_currency_column(df[column])
+
+    return df
+
+
+def sheet_name(value: str):
+    """Returns an Excel sheet argument, with digits meaning a sheet index."""
+    return int(value) if value.isdigit() else value
+
+
+def import_files(paths: list, schema: str, table: str, root: str = None, sheet=0) -> str:
+    """Import CSV/Excel exports of one table into the local store.
+
+    Multiple files are concatenated (e.g. one export per conference).
+
+    Parameters:
+        paths (list): Paths to the exports.
+        schema (str): Database schema the exports mirror (e.g. "Players").
+        table (str): Database table the exports mirror (e.g. "Payroll2020-21").
+        root (str): Local store root directory.
+        sheet: Excel sheet name or index.
+
+    Returns:
+        str: Directory the table was written to.
+    """
+    frames = [read_file(path, sheet) for path in paths]
+    df = normalize_currency_columns(pd.concat(frames, ignore_index=True))
+    meta = {"source":      [os.path.abspath(path) for path in paths],
+            "imported_at": datetime.datetime.now(datetime.timezone.utc).isoformat()}
+    return local_store.write(schema, table, df, root, meta=meta)
+
+
+def import_file(path: str, schema: str, table: str, root: str = None, sheet=0) -> str:
+    """Import a CSV/Excel export into the local store (see import_files)."""
+    return import_files([path], schema, table, root, sheet)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Import CSV/Excel exports into the local store')
+
+    parser.add_argument('files', nargs='+', type=str,
+                        help="CSV/Excel export(s)")
+
+    parser.add_argument('--schema', dest='schema', type=str, metavar='', required=True,
+                        help="Database schema (Players, Teams, Draft)")
+
+    parser.add_argument('--table', dest='table', type=str, metavar='', required=True,
+                        help="Database table (e.g. Payroll2020-21)")
+
+    parser.add_argument('--store', dest='store', type=str, metavar='', required=False, default=None,
+                        help="Local store directory")
+
+    parser.add_argument('--sheet', dest='sheet', type=sheet_name, metavar='', required=False, default=0,
+                        help="Excel sheet name or index")
+
+    args = parser.parse_args()
+
+    print(import_files(args.files, args.schema, args.table, args.store, args.sheet))
@@ -0,0 +1,160 @@
+'''
+Description:
+    - Season-partitioned view of the league tables used by the trade machine
+    - Each season has its own partition holding:
+          + payroll: [Players].[Payroll{season}] with contract columns converted to integers
+          + cap_overview: [Teams].[SalaryCapOverview{season}] with the season and exception usage columns
+            converted to integers
+          + picks: rows of [Draft].[FuturePicks] for drafts from the end of the season onwards
+          + constants: salary cap, luxury tax and tax apron of the season
+    - Partitions are loaded the first time they are used and cached independently, so comparing
+      trades across seasons only reads the seasons it touches
+'''
+import re
+import sys
+from db import draft as draftDB
+from db import financial as financialDB
+from db import local_store
+from enums.salary_cap import LuxuryTax
+from enums.salary_cap import SalaryCap
+from enums.salary_cap import TaxApron
+from helpers import trade_utils as utils
+
+
+CONTRACT_SEASONS = 4
+
+
+class LeagueStore:
+    """Lazily loaded, per-season cache of the league tables.
+
+    Attributes:
+        store (str): Local store directory to read from instead of the database.
+        partitions (dict): Season to {partition name: value} of everything loaded so far.
+        tables (dict): Tables shared by every season (FuturePicks), read once.
+        stale (dict): Tables served from the local store because the database was unavailable,
+            with the time their local copy was synced.
+    """
+
+    def __init__(self, store: str = None):
+        self.store      = store
+        self.partitions = dict()
+        self.tables     = dict()
+        self.stale      = dict()
+
+    def read(self, db, schema: str, table: str):
+        """Read a table from the local store if one is set, otherwise from the database.
+
+        Parameters:
+            db: Database module to read from (financialDB or draftDB).
+            schema (str): Database schema name.
+            table (str): Database table name.
+
+        Returns:
+            pd.DataFrame: Table contents.
+        """
+        if self.store:
+            return local_store.read(schema, table, self.store)
+
+        df = db.read(schema, table)
+        if df.attrs.get("stale"):
+            self.stale[table] = df.attrs.get("synced_at")
+
+        return df
+
+    def report_stale(self) -> None:
+        """Print one stderr line listing the tables served from local copies, if any."""
+        if not self.stale:
+            return
+
+        tables = ["{} (synced {})".format(table, synced_at or "at an unknown time") for table, synced_at in self.stale.items()]
+        print("Database unavailable; using stale local copies of: {}".format(", ".join(tables)), file=sys.stderr)
+
+    def cached(self, season: str, name: str, loader):
+        """Returns a season's partition, loading it on first use."""
+        partition = self.partitions.setdefault(season, dict())
+        if name not in partition:
+            partition[name] = loader()
+
+        return partition[name]
+
+    def loaded_seasons(self) -> list:
+        """Returns the seasons with at least one partition loaded."""
+        return [season for season, partition in self.partitions.items() if partition]
+
+    def evict(self, season: str = None) -> None:
+        """Drop the cached partitions of a season, or of every season when none is given."""
+        if season is None:
+            self.partitions.clear()
+            self.tables.clear()
+        else:
+            self.partitions.pop(season, None)
+
+    def contract_seasons(self, season: str) -> list:
+        """Returns the seasons whose contracts are used for trades made in season.
+
+        Parameters:
+            season (str): Season year (e.g. "2020-21").
+
+        Returns:
+            list: Season columns of the payroll table, starting with season.
+        """
+        return utils.get_future_seasons(current_season=int(season[:4]), future_season=int(season[-2:]))[1:CONTRACT_SEASONS + 1]
+
+    def payroll(self, season: str):
+        """Returns the season's payroll with every contract column as integers."""
+        def load():
+            df = self.read(financialDB, "Players", "Payroll{}".format(season))
+            for column in self.contract_seasons(season):
+                if column in df.columns:
+                    df[column] = utils.clean_currency_column(df[column])
+            return df
+
+        return self.cached(season, "payroll", load)
+
+    def cap_overview(self, season: str):
+        """Returns the season's salary cap overview with the team salary and exception usage as integers."""
+        def load():
+            table = "SalaryCapOverview{}".format(season)
+            df = self.read(financialDB, "Teams", table)
+            df[season] = utils.clean_currency_column(df[season])
+
+            for column in (utils.MID_LEVEL_EXCEPTION_USED, utils.BI_ANNUAL_EXCEPTION_USED):
+                if column in df.columns:
+                    df[column] = utils.clean_currency_column(df[column])
+                else:
+                    print("[Teams].[{}] has no {} column; hard cap checks assume the exception is unused"
+                          .format(table, column), file=sys.stderr)
+            return df
+
+        return self.cached(season, "cap_overview", load)
+
+    def picks(self, season: str):
+        """Returns the future draft picks from the draft that ends the season onwards."""
+        def load():
+            if "FuturePicks" not in self.tables:
+                self.tables["FuturePicks"] = self.read(draftDB, "Draft", "FuturePicks")
+
+            df = self.tables["FuturePicks"]
+            draft_year = int(season[:4]) + 1
+
+            # Keep rows whose Season does not start with a year (e.g. free text) rather than dropping picks
+            years = df["Season"].astype(str).map(lambda value: re.match(r"\s*(\d{4})", value))
+            keep = [match is None or int(match.group(1)) >= draft_year for match in years]
+            return df[keep]
+
+        return self.cached(season, "picks", load)
+
+    def constants(self, season: str) -> dict:
+        """Returns the salary cap, luxury tax and tax apron of the season.
+
+        Raises:
+            ValueError: If the enums have no figures for the season.
+        """
+        def load():
+            return {
+                "salary_cap": utils.get_season_value(SalaryCap, season),
+                "luxury_tax": utils.get_season_value(LuxuryTax, season),
+                "tax_apron":  utils.get_season_value(TaxApron, season),
+            }
+
+        return self.cached(season, "constants", load)
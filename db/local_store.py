@@ -0,0 +1,124 @@
+'''
+Description:
+    - Local columnar copy of the Azure SQL tables used by the trade machine
+    - Each table is stored as one ".npy" file per column so reads can memory-map them
+    - Layout: <root>/<schema>/<table>/<column>.npy plus a "_meta.json" with the column order
+'''
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+
+META_FILE = "_meta.json"
+
+
+def get_root(root: str = None) -> str:
+    """Returns the local store root directory.
+
+    Parameters:
+        root (str): Explicit root directory. Defaults to $nabLocalStore or "./store".
+
+    Returns:
+        str: Root directory of the local store.
+    """
+    return root or os.getenv('nabLocalStore') or os.path.join(os.getcwd(), "store")
+
+
+def table_path(schema: str, table: str, root: str = None) -> str:
+    """Returns the directory holding the columns of a stored table."""
+    return os.path.join(get_root(root), schema, table)
+
+
+def exists(schema: str, table: str, root: str = None) -> bool:
+    """Returns True if the table has been written to the local store."""
+    return os.path.isfile(os.path.join(table_path(schema, table, root), META_FILE))
+
+
+def read_meta(schema: str, table: str, root: str = None) -> dict:
+    """Returns the metadata stored alongside a table.
+
+    Raises:
+        FileNotFoundError: If the table is not in the local store.
+    """
+    with open(os.path.join(table_path(schema, table, root), META_FILE)) as meta_file:
+        return json.load(meta_file)
+
+
+def write_meta(schema: str, table: str, meta: dict, root: str = None) -> None:
+    """Replace the metadata of a stored table without rewriting its columns."""
+    path = os.path.join(table_path(schema, table, root), META_FILE)
+    with open(path + ".tmp", "w") as meta_file:
+        json.dump(meta, meta_file, indent=2)
+
+    os.replace(path + ".tmp", path)
+
+
+def write(schema: str, table: str, df: pd.DataFrame, root: str = None, meta: dict = None) -> str:
+    """Write a DataFrame to the local store as one memory-mappable array per column.
+
+    Integer and float columns keep their numeric dtype. Every other column is stored
+    as a fixed-width unicode array, which numpy can also memory-map.
+
+    Parameters:
+        schema (str): Database schema name.
+        table (str): Database table name.
+        df (pd.DataFrame): Table contents.
+        root (str): Local store root directory.
+        meta (dict): Extra metadata to keep with the table.
+
+    Returns:
+        str: Directory the table was written to.
+    """
+    path = table_path(schema, table, root)
+    tmp_path = path + ".tmp"
+
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for index, column in enumerate(df.columns):
+        values = df[column]
+        if values.dtype.kind in 'iub':
+            array = values.to_numpy(dtype=np.int64)
+        elif values.dtype.kind == 'f':
+            array = values.to_numpy(dtype=np.float64)
+        else:
+            array = np.asarray(values.fillna('').astype(str).to_numpy(), dtype=str)
+
+        # Column names such as "2020-21" are kept in the meta file, files are numbered
+        np.save(os.path.join(tmp_path, "{}.npy".format(index)), array, allow_pickle=False)
+
+    table_meta = dict(meta or dict())
+    table_meta.update({"columns": [str(column) for column in df.columns], "rows": len(df)})
+    with open(os.path.join(tmp_path, META_FILE), "w") as meta_file:
+        json.dump(table_meta, meta_file, indent=2)
+
+    # Swap the new table in only once every column has been written
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def read(schema: str, table: str, root: str = None) -> pd.DataFrame:
+    """Read a table from the local store.
+
+    Numeric columns are memory-mapped, so loading a table does not read it into memory up front.
+
+    Parameters:
+        schema (str): Database schema name.
+        table (str): Database table name.
+        root (str): Local store root directory.
+
+    Returns:
+        pd.DataFrame: Table contents.
+    """
+    path = table_path(schema, table, root)
+    meta = read_meta(schema, table, root)
+
+    columns = dict()
+    for index, column in enumerate(meta["columns"]):
+        columns[column] = np.load(os.path.join(path, "{}.npy".format(index)), mmap_mode='r', allow_pickle=False)
+
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,262 @@
+'''
+Description:
+    - Bounded-latency database access shared by db/financial.py and db/draft.py
+          + Connect and query timeouts, so one slow Azure connection cannot stall the CLI
+          + Bounded retries with jittered exponential backoff, for connection and timeout failures only
+          + A circuit breaker that stops trying after repeated failures and probes again after a cool-down
+          + Fallback to the last good copy of a table, flagged as stale: the read cache if it has one,
+            otherwise the local store filled by db/importer.py and db/sync.py
+    - When a read cache directory is set, successful full-table reads are written there (with currency
+      columns normalized like the importer does) so the fallback stays recent. The local store itself
+      is never written here, so imported and synced tables keep their data and sync state
+
+Settings (environment variables, all optional):
+    - azureDBConnectTimeout: seconds to wait for a connection (default 10)
+    - azureDBQueryTimeout: seconds to wait for a query (default 30)
+    - azureDBRetries: attempts per read (default 3)
+    - nabReadCache: directory to cache successful reads in (off when unset)
+'''
+import os
+import random
+import sys
+import threading
+import time
+import pandas as pd
+import pyodbc
+from db import importer
+from db import local_store
+
+
+DRIVER = '{ODBC Driver 17 for SQL Server}'
+
+BACKOFF_BASE = 0.5    # Seconds before the first retry
+BACKOFF_MAX  = 8.0    # Longest wait between retries
+
+BREAKER_THRESHOLD = 5     # Consecutive failures before the circuit opens
+BREAKER_COOLDOWN  = 60.0  # Seconds before an open circuit lets one probe through
+
+# SQLSTATEs of timeouts; every "08" SQLSTATE is a connection failure
+TIMEOUT_STATES = ("HYT00", "HYT01")
+
+
+class DatabaseUnavailable(Exception):
+    """Raised when the database cannot be reached and there is no local copy to fall back to."""
+
+
+class CircuitBreaker:
+    """Stops calling the database after repeated failures until a cool-down has passed."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown  = cooldown
+        self.failures  = 0
+        self.opened_at = None
+        self.lock      = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns True if a call may be attempted (closed, or open long enough to probe)."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Half-open: let this call probe, and re-open right away if it fails
+                self.opened_at = None
+                self.failures  = self.threshold - 1
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures  = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+# One breaker for the Azure server, shared by every database on it
+breaker = CircuitBreaker()
+
+
+def get_setting(name: str, default: float) -> float:
+    """Returns a numeric setting from the environment."""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def connection_string(database_env: str) -> str:
+    """Build the connection string of a database from the environment.
+
+    Parameters:
+        database_env (str): Environment variable holding the database name (e.g. "azureDBFinancial").
+
+    Returns:
+        str: ODBC connection string.
+
+    Raises:
+        DatabaseUnavailable: If a credential is not set.
+    """
+    settings = {
+        'azureServer':     os.getenv('azureServer'),
+        database_env:      os.getenv(database_env),
+        'azureDBUsername': os.getenv('azureDBUsername'),
+        'azureDBPswd':     os.getenv('azureDBPswd'),
+    }
+
+    missing = [name for name, value in settings.items() if not value]
+    if missing:
+        raise DatabaseUnavailable("Missing database settings: {}".format(", ".join(missing)))
+
+    return 'DRIVER={};SERVER={};PORT=1433;DATABASE={};UID={};PWD={}'.format(
+        DRIVER, settings['azureServer'], settings[database_env], settings['azureDBUsername'], settings['azureDBPswd'])
+
+
+def connect(database_env: str):
+    """Connect to a database with connect and query timeouts.
+
+    Parameters:
+        database_env (str): Environment variable holding the database name.
+
+    Returns:
+        pyodbc.Connection: Open connection.
+    """
+    cnxn = pyodbc.connect(connection_string(database_env),
+                          timeout=int(get_setting('azureDBConnectTimeout', 10)))
+    cnxn.timeout = int(get_setting('azureDBQueryTimeout', 30))
+    return cnxn
+
+
+def backoff(attempt: int) -> float:
+    """Returns a full-jitter wait before retry number attempt (0-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def is_transient(error: Exception) -> bool:
+    """Returns True if an error is a connection or timeout failure worth retrying.
+
+    Programming and integrity errors (e.g. 42S02 "Invalid object name" for a missing table) would fail
+    the same way again, so they are not retried, do not count against the circuit breaker and are not
+    hidden behind a stale local copy.
+    """
+    # pandas wraps errors raised while a query runs in DatabaseError
+    if isinstance(error, pd.errors.DatabaseError) and error.__cause__ is not None:
+        error = error.__cause__
+
+    if isinstance(error, (OSError, pyodbc.OperationalError)):
+        return True
+
+    if isinstance(error, pyodbc.Error) and error.args:
+        state = str(error.args[0])
+        return state.startswith("08") or state in TIMEOUT_STATES
+
+    return False
+
+
+def call(operation):
+    """Run a database operation with bounded retries behind the circuit breaker.
+
+    Parameters:
+        operation: Function taking no arguments that opens a connection and returns a result.
+
+    Returns:
+        Result of operation.
+
+    Raises:
+        DatabaseUnavailable: If the circuit is open or every attempt failed with a connection or timeout error.
+        pyodbc.Error, pd.errors.DatabaseError: Other database errors, raised on the first attempt.
+    """
+    attempts = max(int(get_setting('azureDBRetries', 3)), 1)
+
+    last_error = None
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise DatabaseUnavailable("Database circuit is open after repeated failures") from last_error
+
+        try:
+            result = operation()
+        # pandas wraps errors raised while a query runs (e.g. query timeouts) in DatabaseError
+        except (pyodbc.Error, pd.errors.DatabaseError, OSError) as error:
+            if not is_transient(error):
+                raise
+
+            breaker.record_failure()
+            last_error = error
+            if attempt + 1 < attempts:
+                time.sleep(backoff(attempt))
+            continue
+
+        breaker.record_success()
+        return result
+
+    raise DatabaseUnavailable("Database read failed after {} attempts: {}".format(attempts, last_error)) from last_error
+
+
+def local_copy(schema: str, table: str) -> str:
+    """Returns the root of the local copy of a table to fall back to, or None if there is none.
+
+    The read cache is preferred, as it holds the latest successful read.
+    """
+    for root in (os.getenv('nabReadCache'), local_store.get_root()):
+        if root and local_store.exists(schema, table, root):
+            return root
+
+    return None
+
+
+def cache_read(schema: str, table: str, df: pd.DataFrame) -> None:
+    """Write a successful read to the read cache, if one is set."""
+    root = os.getenv('nabReadCache')
+    if not root:
+        return
+
+    try:
+        version = local_store.read_meta(schema, table, root).get("version", 0) if local_store.exists(schema, table, root) else 0
+        meta = {"source": "database", "version": version + 1,
+                "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        local_store.write(schema, table, importer.normalize_currency_columns(df), root, meta=meta)
+    except OSError:
+        pass
+
+
+def read_table(operation, schema: str, table: str):
+    """Read a full table, falling back to a local copy when the database is unavailable.
+
+    The returned DataFrame's attrs hold "stale" (True when it came from a local copy) and, for stale
+    data, "synced_at"/"version" of the local snapshot ("synced_at" is the import time for imported tables).
+
+    Parameters:
+        operation: Function taking no arguments that reads the table from the database.
+        schema (str): Database schema name.
+        table (str): Database table name.
+
+    Returns:
+        pd.DataFrame: Table contents.
+
+    Raises:
+        DatabaseUnavailable: If the database is unavailable and there is no local copy of the table.
+    """
+    try:
+        df = call(operation)
+    except DatabaseUnavailable as error:
+        root = local_copy(schema, table)
+        if root is None:
+            raise
+
+        meta = local_store.read_meta(schema, table, root)
+        print("Database unavailable ({}); using local copy of [{}].[{}]".format(error, schema, table), file=sys.stderr)
+
+        df = local_store.read(schema, table, root)
+        # Imported tables have never been synced; their import time is when the data was current
+        synced_at = meta.get("synced_at") or meta.get("imported_at")
+        df.attrs.update({"stale": True, "synced_at": synced_at, "version": meta.get("version")})
+        return df
+
+    cache_read(schema, table, df)
+
+    df.attrs["stale"] = False
+    return df
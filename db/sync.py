@@ -0,0 +1,237 @@
+'''
+Description:
+    - Incremental sync of the local store (db/local_store.py) from Azure SQL
+    - Only rows changed since the last sync are pulled, merged into the local snapshot by key,
+      and the snapshot's version is bumped
+    - Change detection strategies:
+          + hash: compare BINARY_CHECKSUM(*) of every row with the hashes kept from the last sync,
+                  then pull only rows whose checksum is new. Needs no schema change and also drops deleted rows
+          + rowversion: pull rows whose rowversion column is above the last synced value
+          + modified: pull rows whose last-modified column is after the last synced value
+    - rowversion/modified cannot see deleted rows; run a hash sync now and then to prune them
+
+Example:
+    python3 -m db.sync --season 2020-21 --strategy rowversion --column RowVersion
+'''
+import argparse
+import datetime
+import pandas as pd
+from db import draft as draftDB
+from db import financial as financialDB
+from db import importer
+from db import local_store
+from helpers import trade_utils as utils
+
+
+# Columns identifying a row of each table when merging changes
+TABLE_KEYS = {
+    "Payroll":           ["Player", "Team"],
+    "SalaryCapOverview": ["Team"],
+    "FuturePicks":       ["Team", "Season", "Round"],
+}
+
+HASH_COLUMN = "SyncHash"
+MARK_COLUMN = "SyncMark"
+
+# SQL Server accepts at most 2100 parameters per query
+MAX_PARAMS = 2000
+
+
+def season_tables(season: str) -> list:
+    """Returns the (db, schema, table, keys) of every table synced for a season."""
+    return [
+        (financialDB, "Players", "Payroll{}".format(season),           TABLE_KEYS["Payroll"]),
+        (financialDB, "Teams",   "SalaryCapOverview{}".format(season), TABLE_KEYS["SalaryCapOverview"]),
+        (draftDB,     "Draft",   "FuturePicks",                        TABLE_KEYS["FuturePicks"]),
+    ]
+
+
+def row_keys(df: pd.DataFrame, keys: list) -> pd.Series:
+    """Returns one string key per row built from the key columns."""
+    return df[keys].astype(str).agg("|".join, axis=1)
+
+
+def normalize_changes(changes: pd.DataFrame, snapshot: pd.DataFrame) -> pd.DataFrame:
+    """Convert changed rows to the snapshot's column types.
+
+    Currency columns that the snapshot stores as integers are cleaned here, so a column that happens to
+    hold only blanks in the changed rows still ends up as integers.
+    """
+    if snapshot is None:
+        return importer.normalize_currency_columns(changes)
+
+    changes = changes.copy()
+    for column in changes.columns:
+        if column in snapshot.columns and snapshot[column].dtype.kind in 'iu':
+            changes[column] = utils.clean_currency_column(changes[column])
+        elif column in snapshot.columns and snapshot[column].dtype.kind != 'f':
+            changes[column] = changes[column].fillna('').astype(str)
+
+    return changes
+
+
+def merge(snapshot: pd.DataFrame, changes: pd.DataFrame, keys: list, deleted: set = None) -> pd.DataFrame:
+    """Merge changed rows into a snapshot, replacing rows with the same key.
+
+    Parameters:
+        snapshot (pd.DataFrame): Current local table, or None on the first sync.
+        changes (pd.DataFrame): New and updated rows.
+        keys (list): Key columns.
+        deleted (set): Keys of rows to drop.
+
+    Returns:
+        pd.DataFrame: Merged table.
+    """
+    if snapshot is None:
+        return changes.reset_index(drop=True)
+
+    snapshot = pd.DataFrame({column: snapshot[column].to_numpy() for column in snapshot.columns})
+    snapshot_keys = row_keys(snapshot, keys)
+
+    drop = set(row_keys(changes, keys)) if len(changes) else set()
+    drop |= deleted or set()
+
+    kept = snapshot[~snapshot_keys.isin(drop)]
+    return pd.concat([kept, changes[snapshot.columns.intersection(changes.columns)]], ignore_index=True)
+
+
+def fetch_hash_changes(db, schema: str, table: str, keys: list, meta: dict) -> tuple:
+    """Pull the rows whose checksum changed since the last sync.
+
+    Returns:
+        tuple: Changed rows, keys of deleted rows, new {key: hash} map.
+    """
+    key_columns = ", ".join("[{}]".format(key) for key in keys)
+    remote = db.query('''SELECT {}, BINARY_CHECKSUM(*) AS [{}] FROM [{}].[{}]'''.format(key_columns, HASH_COLUMN, schema, table))
+
+    remote_hashes = dict(zip(row_keys(remote, keys), remote[HASH_COLUMN].astype(int)))
+    local_hashes = meta.get("hashes", dict())
+
+    changed = sorted({value for key, value in remote_hashes.items() if local_hashes.get(key) != value})
+    deleted = set(local_hashes) - set(remote_hashes)
+
+    frames = list()
+    for start in range(0, len(changed), MAX_PARAMS):
+        params = changed[start:start + MAX_PARAMS]
+        frames.append(db.query('''SELECT * FROM [{}].[{}] WHERE BINARY_CHECKSUM(*) IN ({})'''.format(
+            schema, table, ", ".join("?" * len(params))), params))
+
+    changes = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return changes, deleted, {key: int(value) for key, value in remote_hashes.items()}
+
+
+def fetch_marked_changes(db, schema: str, table: str, strategy: str, column: str, meta: dict) -> tuple:
+    """Pull the rows whose rowversion/last-modified column is past the last synced value.
+
+    Returns:
+        tuple: Changed rows, new watermark.
+    """
+    # rowversion is binary(8); compare it as a number
+    mark = "CAST([{}] AS BIGINT)".format(column) if strategy == "rowversion" else "[{}]".format(column)
+    watermark = meta.get("watermark")
+
+    sql = '''SELECT *, {} AS [{}] FROM [{}].[{}]'''.format(mark, MARK_COLUMN, schema, table)
+    if watermark is None:
+        changes = db.query(sql)
+    else:
+        # Bind a datetime, not the ISO text: DATETIME/DATETIME2 reject strings with too many fractional digits
+        param = watermark if strategy == "rowversion" else datetime.datetime.fromisoformat(watermark)
+        changes = db.query(sql + ''' WHERE {} > ?'''.format(mark), [param])
+
+    if len(changes):
+        watermark = changes[MARK_COLUMN].max()
+        if strategy == "rowversion":
+            watermark = int(watermark)
+        else:
+            # Microseconds at most; dropping nanoseconds rounds down, so a row can only be fetched again
+            watermark = pd.Timestamp(watermark).floor("us").to_pydatetime().isoformat()
+
+    changes = changes.drop(columns=[MARK_COLUMN] + ([column] if strategy == "rowversion" else list()))
+    return changes, watermark
+
+
+def sync_table(db, schema: str, table: str, keys: list, store: str = None, strategy: str = "hash", column: str = None) -> dict:
+    """Bring one table of the local store up to date with the database.
+
+    Parameters:
+        db: Database module to read from (financialDB or draftDB).
+        schema (str): Database schema name.
+        table (str): Database table name.
+        keys (list): Key columns of the table.
+        store (str): Local store directory.
+        strategy (str): "hash", "rowversion" or "modified".
+        column (str): rowversion or last-modified column for those strategies.
+
+    Returns:
+        dict: Table metadata after the sync (version, changed and deleted row counts, ...).
+    """
+    if strategy not in ("hash", "rowversion", "modified"):
+        raise ValueError("Unknown sync strategy: {}".format(strategy))
+    if strategy != "hash" and not column:
+        raise ValueError("The {} strategy needs a column".format(strategy))
+
+    snapshot = local_store.read(schema, table, store) if local_store.exists(schema, table, store) else None
+    meta = local_store.read_meta(schema, table, store) if snapshot is not None else dict()
+
+    # Watermarks and hashes only apply to the strategy that produced them
+    if meta.get("strategy") != strategy or meta.get("column") != column:
+        meta = {"version": meta.get("version", 0)}
+
+    deleted = set()
+    if strategy == "hash":
+        changes, deleted, meta["hashes"] = fetch_hash_changes(db, schema, table, keys, meta)
+    else:
+        changes, meta["watermark"] = fetch_marked_changes(db, schema, table, strategy, column, meta)
+
+    meta.update({
+        "strategy":  strategy,
+        "column":    column,
+        "keys":      keys,
+        "changed":   len(changes),
+        "deleted":   len(deleted),
+        "synced_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    })
+
+    if len(changes) == 0 and not deleted and snapshot is not None:
+        # Nothing to merge; keep the snapshot and its version
+        meta["columns"], meta["rows"] = list(snapshot.columns), len(snapshot)
+        local_store.write_meta(schema, table, meta, store)
+        return meta
+
+    meta["version"] = meta.get("version", 0) + 1
+    merged = merge(snapshot, normalize_changes(changes, snapshot), keys, deleted)
+    local_store.write(schema, table, merged, store, meta=meta)
+
+    return local_store.read_meta(schema, table, store)
+
+
+def sync_season(season: str, store: str = None, strategy: str = "hash", column: str = None) -> dict:
+    """Sync the payroll, cap overview and future picks of a season into the local store.
+
+    Returns:
+        dict: Table name to its metadata after the sync.
+    """
+    return {table: sync_table(db, schema, table, keys, store, strategy, column)
+            for db, schema, table, keys in season_tables(season)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Incrementally sync the local store from the database')
+
+    parser.add_argument('--season', dest='season', type=str, metavar='', required=True,
+                        help="Season to sync")
+
+    parser.add_argument('--store', dest='store', type=str, metavar='', required=False, default=None,
+                        help="Local store directory")
+
+    parser.add_argument('--strategy', dest='strategy', type=str, metavar='', required=False, default='hash',
+                        choices=('hash', 'rowversion', 'modified'),
+                        help="Change detection strategy")
+
+    parser.add_argument('--column', dest='column', type=str, metavar='', required=False, default=None,
+                        help="rowversion or last-modified column")
+
+    args = parser.parse_args()
+
+    for table, meta in sync_season(args.season, args.store, args.strategy, args.column).items():
+        print("{}: version {} ({} changed, {} deleted)".format(table, meta["version"], meta["changed"], meta["deleted"]))
@@ -0,0 +1,27 @@
+from enum import Enum
+
+class SalaryCap(Enum):
+    """
+    The salary cap is the total amount a team can spend on player salaries before it needs an exception
+    (trade matching, mid-level, minimum salary, etc.) to add more.
+    """
+    Year0 = 109140000  # 2020-21
+    Year1 = 112414000  # 2021-22
+
+
+class LuxuryTax(Enum):
+    """
+    Teams whose team salary is above the luxury tax line at the end of the season pay a tax on every dollar over it
+    and are treated as tax paying teams for salary-matching purposes.
+    """
+    Year0 = 132627000  # 2020-21
+    Year1 = 136606000  # 2021-22
+
+
+class TaxApron(Enum):
+    """
+    Teams that use the bi-annual exception or more than the taxpayer portion of the mid-level exception
+    are hard-capped at the tax apron and cannot exceed it at any point during the league year.
+    """
+    Year0 = 138928000  # 2020-21
+    Year1 = 143002000  # 2021-22
@@ -15,6 +15,15 @@ def parse_args():
     parser.add_argument('--dest', dest='dest_teams', nargs='+', type=str, metavar='', required=False, default=list(),
                         help="Abbreviated Destination Trade Teams")
 
+    parser.add_argument('--store', dest='store', type=str, metavar='', required=False, default=None,
+                        help="Local store directory (see db/importer.py) to read instead of the database")
+
+    parser.add_argument('--batch', dest='batch', type=str, metavar='', required=False, default=None,
+                        help="JSONL file of trade proposals to evaluate ('-' for stdin)")
+
+    parser.add_argument('--output', dest='output', type=str, metavar='', required=False, default='-',
+                        help="JSONL file for batch results ('-' for stdout)")
+
     parser.add_argument('--plot', dest='plot', nargs='?', type=str, metavar='', required=False, default='',
                         const='', choices=('bar', 'line', 'pie', 'compare', ''),
                         help='List of plot types')
@@ -1,5 +1,18 @@
+import re
 import sys
 
+CURRENCY_PATTERN = re.compile(r"^\s*\$?\s*-?[\d,]+(\.\d+)?\s*$")
+
+# Seasons whose figures are those of another season: the 2020-21 cap and exceptions were frozen at 2019-20 levels
+SEASON_ALIASES = {"2019-20": "2020-21"}
+
+# Exception amounts used by each team, in the cap overview tables
+MID_LEVEL_EXCEPTION_USED = "MidLevelExceptionUsed"
+BI_ANNUAL_EXCEPTION_USED = "BiAnnualExceptionUsed"
+
+# Money columns of the payroll and cap overview tables: "Guaranteed", exception usage and season columns (e.g. "2020-21")
+MONEY_COLUMN_PATTERN = re.compile(r"^(Guaranteed|{}|{}|\d{{4}}-\d{{2}})$".format(MID_LEVEL_EXCEPTION_USED, BI_ANNUAL_EXCEPTION_USED))
+
 def get_future_seasons(current_season: int, future_season: int) -> list:
     """Generate a list of future seasons based on the current season and a specified future season.
 
@@ -21,6 +34,28 @@ def get_future_seasons(current_season: int, future_season: int) -> list:
     ]
 
 
+def get_season_value(enum_cls, season: str) -> int:
+    """Returns the value of a season-indexed enum, where Year0 is the 2020-21 season.
+
+    Parameters:
+        enum_cls: Enum with Year0, Year1, ... members (e.g. SalaryCap, BiAnnualException).
+        season (str): Season year (e.g. "2021-22").
+
+    Returns:
+        int: Value for the season.
+
+    Raises:
+        ValueError: If the enum has no figure for the season.
+    """
+    year = int(SEASON_ALIASES.get(season, season)[:4]) - 2020
+    member = "Year{}".format(year)
+
+    if year < 0 or member not in enum_cls.__members__:
+        raise ValueError("No {} figure for the {} season".format(enum_cls.__name__, season))
+
+    return enum_cls[member].value
+
+
 def get_team_list() -> list:
     """Returns a list of tuples containing team abbreviations and full team names."""
     return [
@@ -56,3 +91,65 @@ def get_team_full_name(team_abr: str) -> str:
     sys.exit('Invalid Team Abbreviation!')
 
 
+def parse_currency(value) -> int:
+    """Convert a currency string such as "$1,234,567" to an integer.
+
+    Parameters:
+        value: Currency string or number. Empty values are treated as 0.
+
+    Returns:
+        int: Amount in dollars.
+    """
+    if isinstance(value, str):
+        value = value.replace(",", "").replace("$", "").strip()
+        return 0 if value == '' else int(float(value))
+
+    return 0 if value is None or value != value else int(value)
+
+
+def is_currency_column(values, require_dollar: bool = True) -> bool:
+    """Returns True if every non-empty value is a currency string and at least one contains "$".
+
+    Parameters:
+        values: Iterable of column values.
+        require_dollar (bool): Set to False for known money columns, so plain numbers ("1234567") also count.
+    """
+    found_dollar = False
+    for value in values:
+        if not isinstance(value, str):
+            return False
+        if value.strip() == '':
+            continue
+        if not CURRENCY_PATTERN.match(value):
+            return False
+        found_dollar = found_dollar or "$" in value
+
+    return found_dollar or not require_dollar
+
+
+def is_money_column(name) -> bool:
+    """Returns True if a column holds money by its name, whether or not its values have a "$".
+
+    Excel stores currency as numbers with a display format, so exports can hold "1234567" instead of "$1,234,567".
+
+    Parameters:
+        name: Column name.
+    """
+    return isinstance(name, str) and MONEY_COLUMN_PATTERN.match(name.strip()) is not None
+
+
+def clean_currency_column(column):
+    """Convert a pandas Series of currency strings to integers.
+
+    Columns that are already integers (e.g. read from the local store) are returned unchanged.
+
+    Parameters:
+        column (pd.Series): Column of currency values.
+
+    Returns:
+        pd.Series: Column of integer amounts.
+    """
+    if column.dtype.kind in 'iu':
+        return column
+
+    return column.map(parse_currency).astype(int)
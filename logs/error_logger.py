@@ -15,7 +15,17 @@ def report_error(team: str, limit: float, contract: float) -> None:
 
     # Construct error message for log file
     error_message = f"{team} can only take up to ${limit_str}. Cannot take contract ${contract_str}."
-    print(error_message)
+    report_errors([error_message])
+
+
+def report_errors(error_messages: list) -> None:
+    """Report errors and exit program.
+
+    Parameters:
+        error_messages (list): Error messages.
+    """
+    for error_message in error_messages:
+        print(error_message)
     
     # Get current directory
     current_directory = os.getcwd()
@@ -29,9 +39,10 @@ def report_error(team: str, limit: float, contract: float) -> None:
     # Define log file path
     log_file_path = os.path.join(logs_directory, "error.log")
 
-    # Write error message to log file
+    # Write error messages to log file
     with open(log_file_path, "a") as log_file:
-        log_file.write(log_error_message + "\n")
+        for error_message in error_messages:
+            log_file.write(error_message + "\n")
     
     # Exit program
     sys.exit("Trade unable to be processed")
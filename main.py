@@ -1,9 +1,28 @@
 from trade_simulation import evaluate_trade
+from trade_screening import load_league_matrix
+from trade_batch import open_stream, stream_trades
+from constraints import compile_rules
+from db.league_store import LeagueStore
 from helpers.cli import parse_args
+from plots import generate_trade_plots
 
 if __name__ == "__main__":
     args = parse_args()
+    league = LeagueStore(args.store)
 
-    pre_trade_teams, post_trade_teams = evaluate_trade(args.season, args.players, args.src_teams, args.dest_teams)
-    if args.plot:
-        generate_trade_plots(args.plot, pre_trade_teams, post_trade_teams)
+    if args.batch:
+        # Load the league once and stream every proposal against it
+        matrix = load_league_matrix(args.season, league)
+        league.report_stale()
+        with open_stream(args.batch, 'r') as lines, open_stream(args.output, 'w') as output:
+            stream_trades(lines, output, matrix, compile_rules(args.season))
+    else:
+        # Rejected trades exit from evaluate_trade; say which data they were judged on either way
+        try:
+            pre_trade_teams, post_trade_teams = evaluate_trade(args.season, args.players, args.src_teams, args.dest_teams,
+                                                               league=league)
+        finally:
+            league.report_stale()
+
+        if args.plot:
+            generate_trade_plots(args.plot, pre_trade_teams, post_trade_teams, args.season)
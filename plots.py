@@ -160,11 +160,12 @@ def create_info_bar_plot(before_teams_to_contracts: dict, after_teams_to_contrac
     plt.show()
 
 
-def create_line_plot(teams_to_contracts: dict) -> None
+def create_line_plot(teams_to_contracts: dict, season: str) -> None:
     """Create line plots showing salary trends for each team.
 
     Args:
         teams_to_contracts (dict): Dictionary mapping teams to their contract details.
+        season (str): Season of the first contract year (e.g. "2020-21").
     """
     # Iterate over each team in involved in the trade
     for team in teams_to_contracts.keys():
@@ -172,7 +173,7 @@ def create_line_plot(teams_to_contracts: dict) -> None
 
         # Iterate over each player and their contracts for the current team
         for player, contracts in sorted(teams_to_contracts[team].players.items(), key=lambda x: x[1], reverse=True):
-            plt.plot(plotutils.get_future_seasons(2020, 21)[1:len(contracts) + 1], contracts,
+            plt.plot(plotutils.get_future_seasons(int(season[:4]), int(season[-2:]))[1:len(contracts) + 1], contracts,
                      marker='', linewidth=2, alpha=0.9, label=player)
 
         # Set y-axis minimum limit to 0
@@ -198,7 +199,7 @@ def create_line_plot(teams_to_contracts: dict) -> None
         plt.show()
 
 
-def generate_trade_plots(plot: str, pre_trade_teams: dict, post_trade_teams: dict) -> None:
+def generate_trade_plots(plot: str, pre_trade_teams: dict, post_trade_teams: dict, season: str) -> None:
     """
     Generate trade plots based on the specified plot type.
 
@@ -206,13 +207,14 @@ def generate_trade_plots(plot: str, pre_trade_teams: dict, post_trade_teams: dic
         plot (str): The type of plot to generate. Supported values: 'pie', 'bar', 'line'.
         pre_trade_teams (dict): Dictionary of pre-trade teams data.
         post_trade_teams (dict): Dictionary of post-trade teams data.
+        season (str): Season the trade was evaluated for.
     """
     match plot:
         case 'pie':
             create_compare_trade_subplots(pre_trade_teams, post_trade_teams)
         case 'bar':
-            create_info_bar_plot(pre_trade_teams, post_trade_teams, "2020-21")
+            create_info_bar_plot(pre_trade_teams, post_trade_teams, season)
         case 'line':
-            create_line_plot(post_trade_teams)
+            create_line_plot(post_trade_teams, season)
 
 
@@ -0,0 +1,167 @@
+'''
+Description:
+    - Answers "which players/packages can team X absorb for a given outgoing salary?"
+    - Every team's first-season salaries are kept sorted with their prefix sums so a query is a few
+      bisects per team instead of trying combinations through evaluate_trade
+
+Notes:
+    - When team X sends out salary S and takes back x from team Y, both sides must match:
+          + x <= limit_X(S): team X can take back x for its outgoing S
+          + S <= limit_Y(x): team Y can take back S for its outgoing x
+    - Both limits come from trade_simulation.salary_matching_limit and increase with the outgoing
+      salary, so the second condition is a lower bound on x found by bisection
+
+Example:
+    index = SalaryMatchIndex(load_trade_teams(season, teams))
+    index.query("Brooklyn Nets", 20000000)
+'''
+
+import bisect
+import functools
+import trade_simulation
+
+
+@functools.lru_cache(maxsize=1024)
+def lowest_matching_salary(outgoing: int, tax_paying: bool) -> int:
+    """Returns the smallest salary whose matching limit covers the outgoing salary.
+
+    Parameters:
+        outgoing (int): Salary the other team has to take back.
+        tax_paying (bool): Whether the other team is a tax paying team.
+
+    Returns:
+        int: Smallest salary the other team can send out and still take back the outgoing salary.
+    """
+    return bisect.bisect_left(range(outgoing + 1), outgoing,
+                              key=lambda salary: trade_simulation.salary_matching_limit(salary, tax_paying))
+
+
+class SalaryMatchIndex:
+    """Sorted salary arrays and prefix sums of every team's roster."""
+
+    def __init__(self, trade_teams: dict):
+        """Build the index.
+
+        Parameters:
+            trade_teams (dict): Trade teams info, as returned by load_trade_teams.
+        """
+        self.salaries   = dict()
+        self.players    = dict()
+        self.prefix     = dict()
+        self.tax_paying = dict()
+
+        for team, data in trade_teams.items():
+            roster = sorted((int(contracts[0]), player) for player, contracts in data.players.items() if contracts)
+
+            self.salaries[team]  = [salary for salary, _ in roster]
+            self.players[team]   = [player for _, player in roster]
+            self.tax_paying[team] = data.taxPaying
+
+            self.prefix[team] = [0]
+            for salary in self.salaries[team]:
+                self.prefix[team].append(self.prefix[team][-1] + salary)
+
+    def window(self, team: str, other_team: str, outgoing: int) -> tuple:
+        """Returns the salary window other_team can send back for team's outgoing salary.
+
+        Parameters:
+            team (str): Team sending out the salary.
+            other_team (str): Team receiving it.
+            outgoing (int): Salary sent out by team.
+
+        Returns:
+            tuple: (lowest, highest) salary other_team can send back. lowest > highest when nothing fits.
+        """
+        highest = int(trade_simulation.salary_matching_limit(outgoing, self.tax_paying[team]))
+        lowest  = lowest_matching_salary(int(outgoing), bool(self.tax_paying[other_team]))
+
+        return lowest, highest
+
+    def singles(self, team: str, outgoing: int) -> list:
+        """Returns every single player on another team that fits team's matching window.
+
+        Parameters:
+            team (str): Team sending out the salary.
+            outgoing (int): Salary sent out by team.
+
+        Returns:
+            list: {"team", "players", "salary"} dicts sorted by team then salary.
+        """
+        matches = list()
+        for other_team, salaries in self.salaries.items():
+            if other_team == team:
+                continue
+
+            lowest, highest = self.window(team, other_team, outgoing)
+            start = bisect.bisect_left(salaries, lowest)
+            stop  = bisect.bisect_right(salaries, highest)
+
+            for index in range(start, stop):
+                matches.append({"team": other_team, "players": [self.players[other_team][index]], "salary": salaries[index]})
+
+        return matches
+
+    def pairs(self, team: str, outgoing: int) -> list:
+        """Returns every pair of players on another team that fits team's matching window.
+
+        Parameters:
+            team (str): Team sending out the salary.
+            outgoing (int): Salary sent out by team.
+
+        Returns:
+            list: {"team", "players", "salary"} dicts sorted by team then first player's salary.
+        """
+        matches = list()
+        for other_team, salaries in self.salaries.items():
+            count = len(salaries)
+            if other_team == team or count < 2:
+                continue
+
+            lowest, highest = self.window(team, other_team, outgoing)
+
+            # Skip teams whose two cheapest players are too expensive or two priciest too cheap
+            prefix = self.prefix[other_team]
+            if prefix[2] > highest or prefix[count] - prefix[count - 2] < lowest:
+                continue
+
+            for first in range(count - 1):
+                salary = salaries[first]
+                if salary + salaries[first + 1] > highest:
+                    break
+
+                start = bisect.bisect_left(salaries, lowest - salary, first + 1)
+                stop  = bisect.bisect_right(salaries, highest - salary, first + 1)
+
+                for second in range(start, stop):
+                    matches.append({
+                        "team":    other_team,
+                        "players": [self.players[other_team][first], self.players[other_team][second]],
+                        "salary":  salary + salaries[second],
+                    })
+
+        return matches
+
+    def query(self, team: str, outgoing: int, pairs: bool = True) -> list:
+        """Returns every single player, and optionally every pair, team can absorb for its outgoing salary.
+
+        Parameters:
+            team (str): Full name of the team sending out the salary.
+            outgoing (int): Salary sent out by team.
+            pairs (bool): Include two-player packages.
+
+        Returns:
+            list: {"team", "players", "salary"} dicts.
+        """
+        matches = self.singles(team, outgoing)
+        if pairs:
+            matches += self.pairs(team, outgoing)
+
+        return matches
+
+    def outgoing_salary(self, team: str, players: list) -> int:
+        """Returns the first-season salary of a package of team's players.
+
+        Raises:
+            ValueError: If a player is not on the team.
+        """
+        return sum(self.salaries[team][self.players[team].index(player)] for player in players)
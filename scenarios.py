@@ -0,0 +1,245 @@
+'''
+Description:
+    - Scenario chains for stacking trades: deal 2 is evaluated on the league as it stands after deal 1
+    - Every step produces a new immutable league state that only stores the teams the trade touched
+      and points to the previous state for everything else, so memory grows with the players moved
+      rather than with league size times steps
+    - Scenarios are never modified, so branching is applying different trades to the same scenario,
+      undoing is going back to the parent and comparing two chains only looks at the teams either touched
+
+Example:
+    base = Scenario.start(trade_teams, compile_rules("2020-21"))
+    deal1 = base.apply({"players": ["Spencer Dinwiddie"], "src": ["BRK"], "dest": ["HOU"]})
+    deal2a = deal1.apply({...})
+    deal2b = deal1.apply({...})
+    compare(deal2a, deal2b)
+'''
+
+from types import MappingProxyType
+from typing import NamedTuple
+from classes.team import Team
+from constraints import ConstraintSet
+from trade_screening import LeagueMatrix
+from trade_screening import PROPOSAL_FIELDS
+from trade_screening import TEAM_NAMES
+from trade_screening import resolve_moves
+
+
+class TeamState(NamedTuple):
+    """Immutable snapshot of a team."""
+    name: str
+    players: MappingProxyType    # Player name to tuple of contracts
+    payroll: int
+    taxPaying: bool
+    midLevelExceptionUsed: int
+    biAnnualExceptionUsed: int
+
+
+class LeagueState:
+    """Persistent league: the teams changed by one step plus a link to the previous state."""
+
+    def __init__(self, teams: dict, parent: "LeagueState" = None):
+        self.teams  = MappingProxyType(dict(teams))
+        self.parent = parent
+        self.depth  = parent.depth + 1 if parent else 0
+
+    def team(self, name: str) -> TeamState:
+        """Returns the latest state of a team, walking back through previous states."""
+        state = self
+        while state is not None:
+            if name in state.teams:
+                return state.teams[name]
+            state = state.parent
+
+        raise KeyError(name)
+
+    def team_names(self) -> list:
+        """Returns every team in the league."""
+        state = self
+        while state.parent is not None:
+            state = state.parent
+
+        return list(state.teams)
+
+
+class Scenario:
+    """One step of a trade chain.
+
+    Attributes:
+        state (LeagueState): League after this step.
+        trade (dict): Proposal applied by this step (None for the starting point).
+        result (dict): Verdict of the trade from ConstraintSet.check.
+        parent (Scenario): Previous step.
+        rules (ConstraintSet): Rules every trade of the chain is checked against.
+    """
+
+    def __init__(self, state: LeagueState, rules: ConstraintSet, trade: dict = None, result: dict = None,
+                 parent: "Scenario" = None):
+        self.state  = state
+        self.rules  = rules
+        self.trade  = trade
+        self.result = result
+        self.parent = parent
+
+    @classmethod
+    def start(cls, trade_teams: dict, rules: ConstraintSet) -> "Scenario":
+        """Start a chain from teams loaded with load_trade_teams/determine_tax_paying_teams.
+
+        Parameters:
+            trade_teams (dict): Trade teams info.
+            rules (ConstraintSet): Compiled rules of the season (see constraints.compile_rules). Tax status
+                is re-evaluated against its luxury tax after every trade.
+
+        Returns:
+            Scenario: Starting point of the chain.
+        """
+        teams = dict()
+        for name, data in trade_teams.items():
+            players = {player: tuple(contracts) for player, contracts in data.players.items()}
+            payroll = data.payroll or sum(contracts[0] for contracts in players.values() if contracts)
+            teams[name] = TeamState(name, MappingProxyType(players), int(payroll), data.taxPaying,
+                                    data.midLevelExceptionUsed, data.biAnnualExceptionUsed)
+
+        return cls(LeagueState(teams), rules)
+
+    def team(self, name: str) -> TeamState:
+        """Returns a team as it stands at this step."""
+        return self.state.team(name)
+
+    def apply(self, trade: dict, enforce: bool = True) -> "Scenario":
+        """Apply a trade on top of this step.
+
+        The trade is resolved and checked the same way as screened proposals (trade_screening.resolve_moves
+        and ConstraintSet.check), against a matrix of the teams it involves.
+
+        Parameters:
+            trade (dict): {"players": [...], "src": [...], "dest": [...]} with abbreviated team names.
+            enforce (bool): Refuse trades that break a rule.
+
+        Returns:
+            Scenario: New step; this one is left unchanged.
+
+        Raises:
+            ValueError: If the trade is malformed, or breaks a rule while enforce is set.
+        """
+        # Only the teams involved are loaded into the matrix; unknown teams are reported by resolve_moves
+        involved = set()
+        for field in PROPOSAL_FIELDS[1:]:
+            teams = trade.get(field)
+            if isinstance(teams, (list, tuple)):
+                involved.update(TEAM_NAMES.get(team) for team in teams if isinstance(team, str))
+
+        matrix = LeagueMatrix.from_trade_teams(self.trade_teams(sorted(involved & set(self.state.team_names()))))
+
+        result = self.rules.check(matrix, [trade])[0]
+        if result["errors"]:
+            raise ValueError("; ".join(result["errors"]))
+
+        if enforce and not result["legal"]:
+            violations = ["{} ({})".format(violation["message"], violation["team"]) for violation in result["violations"]]
+            raise ValueError("Trade breaks the CBA rules: {}".format("; ".join(violations)))
+
+        # Only the teams involved are copied; every other team is shared with this step
+        moves, _ = resolve_moves(matrix, trade)
+        rosters = dict()
+        for row, src, dest in moves:
+            for team in (matrix.teams[src], matrix.teams[dest]):
+                if team not in rosters:
+                    rosters[team] = dict(self.team(team).players)
+
+            player = matrix.players[row][1]
+            rosters[matrix.teams[dest]][player] = rosters[matrix.teams[src]].pop(player)
+
+        teams = dict()
+        for team in result["teams"]:
+            before = self.team(team["team"])
+            payroll = before.payroll - team["outgoing"] + team["incoming"]
+            teams[before.name] = before._replace(players=MappingProxyType(rosters[before.name]), payroll=payroll,
+                                                 taxPaying=payroll > self.rules.constants["luxury_tax"])
+
+        return Scenario(LeagueState(teams, self.state), self.rules, trade, result, self)
+
+    def undo(self) -> "Scenario":
+        """Returns the step before this one (the starting point undoes to itself)."""
+        return self.parent or self
+
+    def history(self) -> list:
+        """Returns the trades applied from the starting point to this step, in order."""
+        trades = list()
+        scenario = self
+        while scenario.parent is not None:
+            trades.append(scenario.trade)
+            scenario = scenario.parent
+
+        return trades[::-1]
+
+    def changed_teams(self, ancestor: "Scenario" = None) -> set:
+        """Returns the teams touched between an ancestor (default: the starting point) and this step."""
+        teams = set()
+        scenario = self
+        while scenario.parent is not None and scenario is not ancestor:
+            teams.update(scenario.state.teams)
+            scenario = scenario.parent
+
+        return teams
+
+    def trade_teams(self, teams: list = None) -> dict:
+        """Returns Team objects for plotting or evaluate_* functions.
+
+        Parameters:
+            teams (list): Team names. Defaults to the teams touched by the chain.
+        """
+        trade_teams = dict()
+        for name in teams if teams is not None else sorted(self.changed_teams()):
+            state = self.team(name)
+            trade_teams[name] = Team()
+            trade_teams[name].name      = name
+            trade_teams[name].players   = {player: list(contracts) for player, contracts in state.players.items()}
+            trade_teams[name].payroll   = state.payroll
+            trade_teams[name].taxPaying = state.taxPaying
+            trade_teams[name].midLevelExceptionUsed = state.midLevelExceptionUsed
+            trade_teams[name].biAnnualExceptionUsed = state.biAnnualExceptionUsed
+
+        return trade_teams
+
+
+def common_ancestor(first: Scenario, second: Scenario) -> Scenario:
+    """Returns the latest step shared by two chains, or None if they come from different starting points."""
+    ancestors = set()
+    scenario = first
+    while scenario is not None:
+        ancestors.add(id(scenario))
+        scenario = scenario.parent
+
+    scenario = second
+    while scenario is not None and id(scenario) not in ancestors:
+        scenario = scenario.parent
+
+    return scenario
+
+
+def compare(first: Scenario, second: Scenario) -> dict:
+    """Compare two alternative chains.
+
+    Only teams touched after the chains split are compared, so the cost does not depend on league size.
+
+    Returns:
+        dict: Team name to {"only_first", "only_second", "payroll"} for every team that differs.
+    """
+    ancestor = common_ancestor(first, second)
+    teams = first.changed_teams(ancestor) | second.changed_teams(ancestor)
+
+    differences = dict()
+    for team in sorted(teams):
+        first_team, second_team = first.team(team), second.team(team)
+        only_first  = sorted(set(first_team.players) - set(second_team.players))
+        only_second = sorted(set(second_team.players) - set(first_team.players))
+
+        if only_first or only_second or first_team.payroll != second_team.payroll:
+            differences[team] = {
+                "only_first":  only_first,
+                "only_second": only_second,
+                "payroll":     (first_team.payroll, second_team.payroll),
+            }
+
+    return differences
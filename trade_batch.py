@@ -0,0 +1,92 @@
+'''
+Description:
+    - Streaming batch mode: evaluate a file of trade proposals against one loaded league
+    - Proposals are read one JSON object per line and each result is written as one JSON line as soon
+      as it is evaluated, so memory stays flat and output starts right away
+
+Input (one per line):
+    {"id": "deal-1", "players": ["Spencer Dinwiddie", "P.J. Tucker"], "src": ["BRK", "HOU"], "dest": ["HOU", "BRK"]}
+
+Output (one per line):
+    {"line": 1, "id": "deal-1", "legal": true, "players": [...], "teams": [...], "violations": [...], "errors": [...]}
+
+Example:
+    python3 main.py --season 2020-21 --batch proposals.jsonl > results.jsonl
+    cat proposals.jsonl | python3 main.py --batch - --output results.jsonl
+'''
+
+import contextlib
+import json
+import sys
+from trade_screening import LeagueMatrix
+from trade_screening import screen_chunk
+
+
+def rejected(line_number: int, error: str) -> dict:
+    """Returns the result of a line that could not be read as a proposal."""
+    return {"line": line_number, "id": None, "legal": False, "players": list(), "teams": list(), "violations": list(),
+            "errors": [error]}
+
+
+def evaluate_line(line_number: int, line: str, matrix: LeagueMatrix, rules=None) -> dict:
+    """Evaluate one JSONL proposal.
+
+    Parameters:
+        line_number (int): 1-based line number, reported back with the result.
+        line (str): JSON object with "players", "src" and "dest" (and optionally "id").
+        matrix (LeagueMatrix): League to evaluate against.
+        rules (constraints.ConstraintSet): Compiled CBA rules to check as well as salary matching.
+
+    Returns:
+        dict: Result of the proposal (see trade_screening.screen_proposal).
+    """
+    try:
+        proposal = json.loads(line)
+    except json.JSONDecodeError as error:
+        return rejected(line_number, "Invalid JSON: {}".format(error))
+
+    if not isinstance(proposal, dict):
+        return rejected(line_number, "Proposal must be a JSON object")
+
+    # One bad proposal must not stop the stream
+    try:
+        result = screen_chunk([(line_number, proposal)], matrix, rules)[0]
+    except Exception as error:
+        return {**rejected(line_number, "Proposal could not be evaluated: {!r}".format(error)), "id": proposal.get("id")}
+
+    result.pop("index")
+
+    return {"line": line_number, "id": proposal.get("id"), **result}
+
+
+def stream_trades(lines, output, matrix: LeagueMatrix, rules=None) -> int:
+    """Evaluate proposals as they are read and write each result as it completes.
+
+    Parameters:
+        lines: Iterable of JSONL lines (an open file or sys.stdin).
+        output: Writable text stream.
+        matrix (LeagueMatrix): League to evaluate against.
+        rules (constraints.ConstraintSet): Compiled CBA rules to check as well as salary matching.
+
+    Returns:
+        int: Number of proposals evaluated.
+    """
+    count = 0
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        result = evaluate_line(line_number, line, matrix, rules)
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        count += 1
+
+    return count
+
+
+def open_stream(path: str, mode: str):
+    """Open a file for streaming, with "-" meaning stdin/stdout (left open when the with block exits)."""
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin if 'r' in mode else sys.stdout)
+
+    return open(path, mode)
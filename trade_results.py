@@ -0,0 +1,250 @@
+'''
+Description:
+    - Compact columnar serialization of evaluated trades (results of trade_screening/trade_batch)
+    - Only what dashboards need is kept: moved players, per-team totals and limits, verdicts,
+      rule violations and errors. No Team or DraftInfo objects are stored or rebuilt
+    - Results are written as a numpy ".npz" archive of flat columns:
+          + results:    line, id, legal
+          + players:    result, player, src, dest, salary
+          + teams:      result, team, outgoing, incoming, limit, taxPaying, legal
+          + violations: result, team, rule, message
+          + errors:     result, message
+      Every string (player, team, id, rule, message) is dictionary-encoded into one UTF-8 byte buffer
+      ("strings/data") with the start of every string in "strings/offsets", so thousands of results are
+      a handful of numeric arrays and long strings take no room in short ones. No pickling is involved
+    - Ids are stored as their JSON text, so numeric and string ids (5 and "5") load back as they were given
+
+Example:
+    dump(results, "results.npz")
+    table = load("results.npz")
+    table.column("teams", "limit")   # numpy array for every team of every result
+    table[0]                         # result dict, same shape as trade_screening.screen_proposal
+'''
+
+import io
+import json
+import numpy as np
+
+
+# Column name and dtype of every table; string columns hold codes into the "strings" buffer.
+# Salaries are stored as uint32, which holds up to $4.29B.
+SCHEMA = {
+    "results": [
+        ("line",      np.int64),
+        ("id",        np.int32),
+        ("legal",     np.bool_),
+    ],
+    "players": [
+        ("result",    np.int32),
+        ("player",    np.int32),
+        ("src",       np.int32),
+        ("dest",      np.int32),
+        ("salary",    np.uint32),
+    ],
+    "teams": [
+        ("result",    np.int32),
+        ("team",      np.int32),
+        ("outgoing",  np.uint32),
+        ("incoming",  np.uint32),
+        ("limit",     np.float64),
+        ("taxPaying", np.bool_),
+        ("legal",     np.bool_),
+    ],
+    "violations": [
+        ("result",    np.int32),
+        ("team",      np.int32),
+        ("rule",      np.int32),
+        ("message",   np.int32),
+    ],
+    "errors": [
+        ("result",    np.int32),
+        ("message",   np.int32),
+    ],
+}
+
+STRING_COLUMNS = {"id", "player", "src", "dest", "team", "rule", "message"}
+
+# Code of missing strings (e.g. a result without an id)
+NO_STRING = -1
+
+
+class StringDictionary:
+    """Assigns each distinct string one integer code."""
+
+    def __init__(self):
+        self.codes   = dict()
+        self.strings = list()
+
+    def encode(self, value) -> int:
+        if value is None:
+            return NO_STRING
+
+        value = str(value)
+        if value not in self.codes:
+            self.codes[value] = len(self.strings)
+            self.strings.append(value)
+
+        return self.codes[value]
+
+
+def encode_id(value):
+    """Returns the JSON text of a result id, which keeps its type through the strings buffer."""
+    return None if value is None else json.dumps(value)
+
+
+def decode_id(text):
+    """Returns the id encoded by encode_id."""
+    return None if text is None else json.loads(text)
+
+
+def encode_strings(strings: list) -> dict:
+    """Returns strings as one UTF-8 buffer and the offsets of each string in it (one more than strings)."""
+    data = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in data], out=offsets[1:])
+
+    return {"strings/data": np.frombuffer(b"".join(data), dtype=np.uint8), "strings/offsets": offsets}
+
+
+def to_columns(results: list) -> dict:
+    """Flatten result dicts into the columns of SCHEMA.
+
+    Parameters:
+        results (list): Result dicts from trade_screening.screen_trades or trade_batch.
+
+    Returns:
+        dict: "table/column" to numpy array, plus "strings/data" and "strings/offsets".
+    """
+    strings = StringDictionary()
+    rows = {table: {column: list() for column, _ in columns} for table, columns in SCHEMA.items()}
+
+    def append(table, **values):
+        for column, value in values.items():
+            rows[table][column].append(strings.encode(value) if column in STRING_COLUMNS else value)
+
+    for position, result in enumerate(results):
+        append("results", line=result.get("line", result.get("index", position)), id=encode_id(result.get("id")),
+               legal=result.get("legal", False))
+
+        for player in result.get("players", list()):
+            append("players", result=position, player=player["player"], src=player["src"], dest=player["dest"],
+                   salary=player["salary"])
+
+        for team in result.get("teams", list()):
+            append("teams", result=position, team=team["team"], outgoing=team["outgoing"], incoming=team["incoming"],
+                   limit=team["limit"], taxPaying=team.get("taxPaying", False), legal=team["legal"])
+
+        for violation in result.get("violations", list()):
+            append("violations", result=position, team=violation["team"], rule=violation["rule"],
+                   message=violation["message"])
+
+        for error in result.get("errors", list()):
+            append("errors", result=position, message=error)
+
+    columns = encode_strings(strings.strings)
+    for table, table_columns in SCHEMA.items():
+        for column, dtype in table_columns:
+            columns["{}/{}".format(table, column)] = np.array(rows[table][column], dtype=dtype)
+
+    return columns
+
+
+def dump(results: list, file, compress: bool = False) -> None:
+    """Write results to a path or binary file object (e.g. socket.makefile("wb")).
+
+    Parameters:
+        results (list): Result dicts.
+        file: Path or writable binary file object.
+        compress (bool): Deflate the columns. Smaller, but slower to write and read.
+    """
+    save = np.savez_compressed if compress else np.savez
+    save(file, **to_columns(results))
+
+
+def dumps(results: list, compress: bool = False) -> bytes:
+    """Returns results serialized to bytes."""
+    buffer = io.BytesIO()
+    dump(results, buffer, compress)
+    return buffer.getvalue()
+
+
+def load(file) -> "ResultTable":
+    """Read results written by dump from a path or binary file object."""
+    with np.load(file, allow_pickle=False) as archive:
+        return ResultTable({name: archive[name] for name in archive.files})
+
+
+def loads(data: bytes) -> "ResultTable":
+    """Read results serialized by dumps."""
+    return load(io.BytesIO(data))
+
+
+class ResultTable:
+    """Evaluated trades loaded back as columns.
+
+    Columns can be used directly (e.g. every team's limit as one array), and single results can be
+    rebuilt as plain dicts without any Team objects.
+    """
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.string_data    = columns["strings/data"].tobytes()
+        self.string_offsets = columns["strings/offsets"]
+
+        # Rows of each child table are grouped by result; offsets find a result's rows with one bisect
+        self.offsets = {table: np.searchsorted(columns["{}/result".format(table)], np.arange(len(self) + 1))
+                        for table in SCHEMA if table != "results"}
+
+    def __len__(self) -> int:
+        return len(self.columns["results/line"])
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def column(self, table: str, column: str) -> np.ndarray:
+        """Returns one column; string columns are decoded."""
+        values = self.columns["{}/{}".format(table, column)]
+        if table == "results" and column == "id":
+            return np.array([decode_id(self.decode(code)) for code in values], dtype=object)
+        if column in STRING_COLUMNS:
+            return np.array([self.decode(code) for code in values], dtype=object)
+
+        return values
+
+    def decode(self, code: int):
+        if code == NO_STRING:
+            return None
+
+        start, stop = self.string_offsets[code], self.string_offsets[code + 1]
+        return self.string_data[start:stop].decode("utf-8")
+
+    def rows(self, table: str, position: int) -> list:
+        """Returns the rows of a child table belonging to one result, as dicts."""
+        start, stop = self.offsets[table][position], self.offsets[table][position + 1]
+
+        rows = list()
+        for row in range(start, stop):
+            values = dict()
+            for column, _ in SCHEMA[table]:
+                if column == "result":
+                    continue
+                value = self.columns["{}/{}".format(table, column)][row]
+                values[column] = self.decode(value) if column in STRING_COLUMNS else value.item()
+            rows.append(values)
+
+        return rows
+
+    def __getitem__(self, position: int) -> dict:
+        if not 0 <= position < len(self):
+            raise IndexError("result index out of range")
+
+        return {
+            "line":       int(self.columns["results/line"][position]),
+            "id":         decode_id(self.decode(self.columns["results/id"][position])),
+            "legal":      bool(self.columns["results/legal"][position]),
+            "players":    self.rows("players", position),
+            "teams":      self.rows("teams", position),
+            "violations": self.rows("violations", position),
+            "errors":     [row["message"] for row in self.rows("errors", position)],
+        }
@@ -0,0 +1,509 @@
+'''
+Description:
+    - Screen many trade proposals against one loaded league
+    - The league's contracts are flattened into a LeagueMatrix:
+          + salaries: players x seasons array of contract amounts
+          + player_teams: team index of every player
+          + tax_paying: tax flag of every team
+          + payroll, mle_used, bae_used: team salary and exception usage, for the constraints engine
+    - Proposals are resolved once into flat integer move arrays (proposal, player row, source and
+      destination team), and every (proposal, team) total is computed with vectorized numpy
+    - In parallel mode the matrix is published once into multiprocessing.shared_memory; workers receive
+      slices of the move arrays, evaluate them against a zero-copy view of the league and send back
+      per-team arrays (totals, limits, verdicts). Result dicts are only built when they are read
+
+Notes:
+    - A proposal is a dict with the same fields as the CLI: {"players": [...], "src": [...], "dest": [...]}
+      where "src" and "dest" are abbreviated team names
+    - Salary matching uses the first season of each contract, same as the constraints engine
+'''
+
+import multiprocessing
+from collections.abc import Sequence
+from multiprocessing import shared_memory
+import numpy as np
+import trade_simulation
+from db.league_store import LeagueStore
+from helpers import trade_utils as utils
+
+
+SEASON_COUNT = 4
+
+# Columns of the per-team arrays returned by screen_moves
+TEAM_COLUMNS = ("proposal", "team", "outgoing", "incoming", "limit", "taxPaying", "legal")
+
+# Fields of a trade proposal, each a list with one entry per player
+PROPOSAL_FIELDS = ("players", "src", "dest")
+
+# Abbreviated team names to full team names, without exiting on unknown teams like utils.get_team_full_name
+TEAM_NAMES = dict(utils.get_team_list())
+
+
+class LeagueMatrix:
+    """Contract data of a whole league laid out as flat numpy arrays.
+
+    Attributes:
+        teams (list): Full team names, indexed by team index.
+        players (list): (team index, player name) of every row of salaries.
+        salaries (np.ndarray): int64 players x seasons contract amounts (0 when there is no contract).
+        player_teams (np.ndarray): int16 team index of every player.
+        tax_paying (np.ndarray): bool tax flag of every team.
+        payroll (np.ndarray): int64 team salary of every team.
+        mle_used (np.ndarray): int64 mid-level exception amount used by every team.
+        bae_used (np.ndarray): int64 bi-annual exception amount used by every team.
+    """
+    ARRAYS = ("salaries", "player_teams", "tax_paying", "payroll", "mle_used", "bae_used")
+
+    def __init__(self, teams, players, salaries, player_teams, tax_paying, payroll, mle_used, bae_used):
+        self.teams        = list(teams)
+        self.players      = list(players)
+        self.salaries     = salaries
+        self.player_teams = player_teams
+        self.tax_paying   = tax_paying
+        self.payroll      = payroll
+        self.mle_used     = mle_used
+        self.bae_used     = bae_used
+        self.team_index   = {team: index for index, team in enumerate(self.teams)}
+        self.player_index = {player: row for row, player in enumerate(self.players)}
+        self.blocks       = list()
+
+    @classmethod
+    def from_trade_teams(cls, trade_teams: dict) -> "LeagueMatrix":
+        """Build a matrix from the Team objects returned by load_trade_teams.
+
+        Parameters:
+            trade_teams (dict): Trade teams info.
+
+        Returns:
+            LeagueMatrix: Flattened league.
+        """
+        teams = list(trade_teams.keys())
+        players = [(index, player) for index, team in enumerate(teams) for player in trade_teams[team].players]
+
+        salaries = np.zeros((len(players), SEASON_COUNT), dtype=np.int64)
+        player_teams = np.zeros(len(players), dtype=np.int16)
+        for row, (index, player) in enumerate(players):
+            contracts = trade_teams[teams[index]].players[player][:SEASON_COUNT]
+            salaries[row, :len(contracts)] = contracts
+            player_teams[row] = index
+
+        tax_paying = np.array([trade_teams[team].taxPaying for team in teams], dtype=bool)
+        mle_used   = np.array([trade_teams[team].midLevelExceptionUsed for team in teams], dtype=np.int64)
+        bae_used   = np.array([trade_teams[team].biAnnualExceptionUsed for team in teams], dtype=np.int64)
+
+        # Teams without a cap sheet fall back to the sum of their roster's salaries
+        payroll = np.bincount(player_teams, weights=salaries[:, 0], minlength=len(teams)).astype(np.int64)
+        for index, team in enumerate(teams):
+            payroll[index] = trade_teams[team].payroll or payroll[index]
+
+        return cls(teams, players, salaries, player_teams, tax_paying, payroll, mle_used, bae_used)
+
+    def share(self) -> dict:
+        """Copy the arrays into shared memory blocks owned by this process.
+
+        Returns:
+            dict: Handle to pass to LeagueMatrix.attach in other processes.
+        """
+        handle = {"teams": self.teams, "players": self.players, "arrays": dict()}
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[...] = array
+
+            setattr(self, name, shared)
+            self.blocks.append(block)
+            handle["arrays"][name] = (block.name, array.shape, array.dtype.str)
+
+        return handle
+
+    @classmethod
+    def attach(cls, handle: dict) -> "LeagueMatrix":
+        """Build a read-only matrix on top of shared memory blocks published by LeagueMatrix.share.
+
+        Parameters:
+            handle (dict): Handle returned by LeagueMatrix.share.
+
+        Returns:
+            LeagueMatrix: Zero-copy view of the shared league.
+        """
+        arrays = dict()
+        blocks = list()
+        for name, (block_name, shape, dtype) in handle["arrays"].items():
+            block = shared_memory.SharedMemory(name=block_name)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            arrays[name].flags.writeable = False
+            blocks.append(block)
+
+        matrix = cls(handle["teams"], handle["players"], **arrays)
+        matrix.blocks = blocks
+        return matrix
+
+    def close(self, unlink: bool = False) -> None:
+        """Release the shared memory blocks held by this matrix.
+
+        Parameters:
+            unlink (bool): Also destroy the blocks. Only the process that called share should do this.
+        """
+        if self.blocks:
+            # Keep private copies so the matrix stays usable once the blocks are gone
+            for name in self.ARRAYS:
+                setattr(self, name, np.array(getattr(self, name)))
+
+        for block in self.blocks:
+            block.close()
+            if unlink:
+                block.unlink()
+
+        self.blocks = list()
+
+
+def load_league_matrix(season: str, league: LeagueStore = None) -> LeagueMatrix:
+    """Load every team of the league and flatten it into a LeagueMatrix.
+
+    Parameters:
+        season (str): Season year.
+        league (LeagueStore): League tables to read from. Defaults to the database.
+
+    Returns:
+        LeagueMatrix: Flattened league.
+    """
+    teams = [full_name for _, full_name in utils.get_team_list()]
+
+    trade_teams = trade_simulation.load_trade_teams(season, teams, league)
+    trade_simulation.determine_tax_paying_teams(season, trade_teams, league)
+
+    return LeagueMatrix.from_trade_teams(trade_teams)
+
+
+def resolve_moves(matrix: LeagueMatrix, proposal: dict) -> tuple:
+    """Resolve the players of a trade proposal to rows of the matrix.
+
+    Parameters:
+        matrix (LeagueMatrix): League to evaluate against.
+        proposal (dict): {"players": [...], "src": [...], "dest": [...]}.
+
+    Returns:
+        tuple: List of (player row, source team index, destination team index), list of error messages.
+    """
+    fields = [proposal.get(field, list()) for field in PROPOSAL_FIELDS]
+    for field, values in zip(PROPOSAL_FIELDS, fields):
+        if not isinstance(values, (list, tuple)) or not all(isinstance(value, str) for value in values):
+            return list(), ['"{}" must be a list of strings'.format(field)]
+
+    players, src_teams, dest_teams = fields
+
+    if not players or not (len(players) == len(src_teams) == len(dest_teams)):
+        return list(), ["Every player needs exactly one source and one destination team"]
+
+    moves = list()
+    errors = list()
+    for player, src, dest in zip(players, src_teams, dest_teams):
+        src_team, dest_team = TEAM_NAMES.get(src), TEAM_NAMES.get(dest)
+        if src_team not in matrix.team_index or dest_team not in matrix.team_index:
+            errors.append("Invalid Team Abbreviation: {} -> {}".format(src, dest))
+            continue
+        if src_team == dest_team:
+            errors.append("{} is already on the {}".format(player, src_team))
+            continue
+
+        row = matrix.player_index.get((matrix.team_index[src_team], player))
+        if row is None:
+            errors.append("{} is not on the {}".format(player, src_team))
+            continue
+
+        moves.append((row, matrix.team_index[src_team], matrix.team_index[dest_team]))
+
+    return moves, errors
+
+
+def encode_proposals(matrix: LeagueMatrix, proposals: list) -> tuple:
+    """Resolve a batch of proposals into flat integer move arrays.
+
+    Parameters:
+        matrix (LeagueMatrix): League to evaluate against.
+        proposals (list): Trade proposals.
+
+    Returns:
+        tuple: Dict of int64 arrays "proposal", "row", "src" and "dest" with one entry per move (in
+            proposal order), list of error messages per proposal. Proposals with errors have no moves.
+    """
+    columns = {"proposal": list(), "row": list(), "src": list(), "dest": list()}
+    errors = list()
+    for proposal_id, proposal in enumerate(proposals):
+        moves, proposal_errors = resolve_moves(matrix, proposal)
+        errors.append(proposal_errors)
+        if proposal_errors:
+            continue
+
+        for row, src, dest in moves:
+            columns["proposal"].append(proposal_id)
+            columns["row"].append(row)
+            columns["src"].append(src)
+            columns["dest"].append(dest)
+
+    return {name: np.array(values, dtype=np.int64) for name, values in columns.items()}, errors
+
+
+def team_rows(matrix: LeagueMatrix, moves: dict) -> tuple:
+    """Group moves into one row per (proposal, team involved), sorted by proposal then team.
+
+    Parameters:
+        matrix (LeagueMatrix): League to evaluate against.
+        moves (dict): Move arrays from encode_proposals.
+
+    Returns:
+        tuple: Dict of row arrays ("proposal", "team", "outgoing", "incoming", "tax_paying", "payroll_after",
+            "roster_after"), row of the source team of every move, row of the destination team of every move.
+    """
+    team_count = len(matrix.teams)
+    salary = matrix.salaries[moves["row"], 0]
+
+    # One key per (proposal, team); np.unique gives each key a row
+    out_keys = moves["proposal"] * team_count + moves["src"]
+    in_keys  = moves["proposal"] * team_count + moves["dest"]
+    keys, inverse = np.unique(np.concatenate((out_keys, in_keys)), return_inverse=True)
+    out_rows, in_rows = inverse[:len(out_keys)], inverse[len(out_keys):]
+
+    def total(rows, weights=None):
+        return np.bincount(rows, weights=weights, minlength=len(keys)).astype(np.int64)
+
+    teams = keys % team_count
+    roster_sizes = np.bincount(matrix.player_teams, minlength=team_count)
+
+    rows = {
+        "proposal":   keys // team_count,
+        "team":       teams,
+        "outgoing":   total(out_rows, salary),
+        "incoming":   total(in_rows, salary),
+        "tax_paying": matrix.tax_paying[teams],
+    }
+    rows["payroll_after"] = matrix.payroll[teams] - rows["outgoing"] + rows["incoming"]
+    rows["roster_after"]  = roster_sizes[teams] - total(out_rows) + total(in_rows)
+
+    return rows, out_rows, in_rows
+
+
+def salary_matching_limits(outgoing: np.ndarray, tax_paying: np.ndarray) -> np.ndarray:
+    """Vectorized trade_simulation.salary_matching_limit.
+
+    Parameters:
+        outgoing (np.ndarray): Outgoing salary of every row.
+        tax_paying (np.ndarray): Tax flag of every row.
+
+    Returns:
+        np.ndarray: Salary limit of every row.
+    """
+    tax_limit = outgoing * trade_simulation.TRADE_PCT + trade_simulation.TRADE_SALARY_ADDITION
+
+    non_tax_limit = np.select(
+        [outgoing < trade_simulation.NON_TAX_MIN_SALARY, outgoing <= trade_simulation.NON_TAX_MAX_SALARY],
+        [outgoing * trade_simulation.NON_TAX_MIN_TRADE_PCT + trade_simulation.TRADE_SALARY_ADDITION,
+         outgoing + trade_simulation.NON_TAX_MID_SALARY_ADDITION],
+        tax_limit)
+
+    return np.where(tax_paying, tax_limit, non_tax_limit)
+
+
+def match_salaries(matrix: LeagueMatrix, moves: dict) -> tuple:
+    """Salary matching of encoded moves.
+
+    Returns:
+        tuple: Dict of TEAM_COLUMNS arrays, None (no rule violations).
+    """
+    rows, _, _ = team_rows(matrix, moves)
+    limit = salary_matching_limits(rows["outgoing"], rows["tax_paying"])
+
+    teams = {
+        "proposal":  rows["proposal"],
+        "team":      rows["team"],
+        "outgoing":  rows["outgoing"],
+        "incoming":  rows["incoming"],
+        "limit":     limit,
+        "taxPaying": rows["tax_paying"],
+        "legal":     rows["incoming"] <= limit,
+    }
+    return teams, None
+
+
+# League view and compiled rules of each worker process, set once by init_worker
+worker_matrix = None
+worker_rules  = None
+
+
+def init_worker(handle: dict, rules=None) -> None:
+    """Attach a pool worker to the shared league."""
+    global worker_matrix, worker_rules
+    worker_matrix = LeagueMatrix.attach(handle)
+    worker_rules  = rules
+
+
+def screen_moves(moves: dict, matrix: LeagueMatrix = None, rules=None) -> tuple:
+    """Evaluate encoded moves, against the worker's shared league and rules by default.
+
+    Parameters:
+        moves (dict): Move arrays from encode_proposals (or a slice of them).
+        matrix (LeagueMatrix): League to evaluate against.
+        rules (constraints.ConstraintSet): Compiled CBA rules. Without them only salary matching is checked.
+
+    Returns:
+        tuple: Dict of TEAM_COLUMNS arrays, dict of "row"/"rule" violation arrays (None without rules).
+    """
+    matrix = matrix or worker_matrix
+    rules  = rules or worker_rules
+
+    if rules is None:
+        return match_salaries(matrix, moves)
+
+    return rules.evaluate(matrix, moves)
+
+
+class ScreenedTrades(Sequence):
+    """Results of a batch of proposals, kept as the arrays returned by screen_moves.
+
+    Items are result dicts (see screen_proposal), built when they are read.
+
+    Attributes:
+        teams (dict): TEAM_COLUMNS arrays, one entry per (proposal, team involved).
+        violations (dict): "row" (into teams) and "rule" (into rules.rules) arrays, None without rules.
+        legal (np.ndarray): Verdict of every proposal.
+    """
+
+    def __init__(self, matrix: LeagueMatrix, indexes: list, moves: dict, errors: list, teams: dict,
+                 violations: dict = None, rules=None):
+        self.matrix     = matrix
+        self.indexes    = list(indexes)
+        self.moves      = moves
+        self.errors     = errors
+        self.teams      = teams
+        self.violations = violations
+        self.rules      = rules
+
+        count = len(self.indexes)
+        self.legal = np.array([not proposal_errors for proposal_errors in errors], dtype=bool)
+        np.logical_and.at(self.legal, teams["proposal"], teams["legal"])
+
+        # Rows of each result are found with one bisect
+        self.move_offsets = np.searchsorted(moves["proposal"], np.arange(count + 1))
+        self.team_offsets = np.searchsorted(teams["proposal"], np.arange(count + 1))
+
+        if violations is not None:
+            # Stable sort keeps the rule order within each proposal
+            proposals = teams["proposal"][violations["row"]]
+            order = np.argsort(proposals, kind="stable")
+            self.violation_rows  = violations["row"][order]
+            self.violation_rules = violations["rule"][order]
+            self.violation_offsets = np.searchsorted(proposals[order], np.arange(count + 1))
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def __getitem__(self, position: int) -> dict:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("result index out of range")
+
+        matrix = self.matrix
+
+        players = list()
+        for move in range(self.move_offsets[position], self.move_offsets[position + 1]):
+            row = self.moves["row"][move]
+            players.append({"player": matrix.players[row][1], "src": matrix.teams[self.moves["src"][move]],
+                            "dest": matrix.teams[self.moves["dest"][move]], "salary": int(matrix.salaries[row, 0])})
+
+        teams = list()
+        for row in range(self.team_offsets[position], self.team_offsets[position + 1]):
+            teams.append({
+                "team":      matrix.teams[self.teams["team"][row]],
+                "outgoing":  int(self.teams["outgoing"][row]),
+                "incoming":  int(self.teams["incoming"][row]),
+                "limit":     float(self.teams["limit"][row]),
+                "taxPaying": bool(self.teams["taxPaying"][row]),
+                "legal":     bool(self.teams["legal"][row]),
+            })
+
+        result = {"legal": bool(self.legal[position]), "players": players, "teams": teams,
+                  "errors": self.errors[position], "index": self.indexes[position]}
+
+        if self.violations is not None:
+            result["violations"] = list()
+            for violation in range(self.violation_offsets[position], self.violation_offsets[position + 1]):
+                name, _, message = self.rules.rules[self.violation_rules[violation]]
+                team = matrix.teams[self.teams["team"][self.violation_rows[violation]]]
+                result["violations"].append({"team": team, "rule": name, "message": message})
+
+        return result
+
+
+def screen_proposal(matrix: LeagueMatrix, proposal: dict) -> dict:
+    """Evaluate salary matching of one trade proposal.
+
+    Parameters:
+        matrix (LeagueMatrix): League to evaluate against.
+        proposal (dict): {"players": [...], "src": [...], "dest": [...]}.
+
+    Returns:
+        dict: {"legal": bool, "players": [...], "teams": [...], "errors": [...]}.
+            "players" lists each moved player with its salary and "teams" lists, for every team
+            involved, its outgoing and incoming salary, salary limit and verdict.
+    """
+    result = screen_chunk([(0, proposal)], matrix)[0]
+    result.pop("index")
+    return result
+
+
+def screen_chunk(chunk: list, matrix: LeagueMatrix, rules=None) -> list:
+    """Evaluate a chunk of (index, proposal) pairs in this process.
+
+    When rules (a constraints.ConstraintSet) are given, the whole chunk is checked against them in one
+    pass, each result gets a "violations" list and the rules decide "legal" and the per-team verdicts.
+    """
+    moves, errors = encode_proposals(matrix, [proposal for _, proposal in chunk])
+    teams, violations = screen_moves(moves, matrix, rules)
+    return list(ScreenedTrades(matrix, [index for index, _ in chunk], moves, errors, teams, violations, rules))
+
+
+def screen_trades(matrix: LeagueMatrix, proposals: list, workers: int = None, chunk_size: int = 4096,
+                  rules=None) -> ScreenedTrades:
+    """Evaluate many trade proposals, in parallel when more than one worker is requested.
+
+    Parameters:
+        matrix (LeagueMatrix): League to evaluate against.
+        proposals (list): Trade proposals.
+        workers (int): Number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int): Proposals sent to a worker at a time.
+        rules (constraints.ConstraintSet): Compiled CBA rules to check as well as salary matching.
+
+    Returns:
+        ScreenedTrades: One result per proposal (see screen_proposal), in the order of proposals.
+    """
+    moves, errors = encode_proposals(matrix, proposals)
+    workers = workers or multiprocessing.cpu_count()
+
+    if workers == 1 or len(proposals) <= chunk_size:
+        teams, violations = screen_moves(moves, matrix, rules)
+        return ScreenedTrades(matrix, range(len(proposals)), moves, errors, teams, violations, rules)
+
+    # Workers only receive slices of the move arrays and send back per-team arrays
+    bounds = np.searchsorted(moves["proposal"], np.arange(0, len(proposals) + chunk_size, chunk_size))
+    chunks = [{name: values[start:stop] for name, values in moves.items()} for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    # Publish the league once
+    handle = matrix.share()
+    try:
+        with multiprocessing.Pool(workers, initializer=init_worker, initargs=(handle, rules)) as pool:
+            parts = pool.map(screen_moves, chunks)
+    finally:
+        matrix.close(unlink=True)
+
+    teams = {name: np.concatenate([part_teams[name] for part_teams, _ in parts]) for name in TEAM_COLUMNS}
+
+    violations = None
+    if rules is not None:
+        # Violation rows index their chunk's team rows
+        offsets = np.cumsum([0] + [len(part_teams["team"]) for part_teams, _ in parts])
+        violations = {"row":  np.concatenate([part["row"] + offset for (_, part), offset in zip(parts, offsets)]),
+                      "rule": np.concatenate([part["rule"] for _, part in parts])}
+
+    return ScreenedTrades(matrix, range(len(proposals)), moves, errors, teams, violations, rules)
@@ -27,18 +27,28 @@ import sys
 from classes.draft_info import DraftInfo
 from classes.team import Team
 from classes.trade_player import TradePlayer
-from db import financial as financialDB
 from db import draft as draftDB
+from db.league_store import LeagueStore
 from enums.minimum_salaries import MinimumSalaries
 from enums.mid_level_exceptions import MidLevelExceptionNonTaxPayer
 from enums.mid_level_exceptions import MidLevelExceptionTaxPayer
 from enums.mid_level_exceptions import RoomException
 from enums.bi_annual_exception import BiAnnualException
 from helpers import trade_utils as utils
-from logs.error_logger import report_error
+from logs.error_logger import report_errors
 
 
-def evaluate_trade(season: str, players: list, src_teams: list, dest_teams: list) -> tuple:
+# Salary matching in simultaneous trades
+TRADE_SALARY_ADDITION       = 100000
+TRADE_PCT                   = 1.25
+NON_TAX_MIN_SALARY          = 6533333
+NON_TAX_MIN_TRADE_PCT       = 1.75
+NON_TAX_MID_SALARY_ADDITION = 5000000
+NON_TAX_MAX_SALARY          = 19600000
+
+
+def evaluate_trade(season: str, players: list, src_teams: list, dest_teams: list, store: str = None,
+                   league: LeagueStore = None) -> tuple:
     """Evaluate trade from user.
 
     Parameters:
@@ -46,51 +56,56 @@ def evaluate_trade(season: str, players: list, src_teams: list, dest_teams: list
         players (list): List of player names.
         src_teams (list): List of the player's original team names.
         dest_teams (list): List of destination team names.
+        store (str): Local store directory to read from instead of the database.
+        league (LeagueStore): Already loaded league to reuse across trades.
 
     Returns:
         tuple: Pre-trade teams info, post-trade teams info.
     """
+    league = league or LeagueStore(store)
 
-    # Convert Abbreviated Original Team Names to Full Team Names
-    teams = [utils.get_team_full_name(team) for team in src_teams ]
+    # Convert Abbreviated Team Names to Full Team Names
+    teams = list(dict.fromkeys(utils.get_team_full_name(team) for team in src_teams + dest_teams))
 
     # Get Traded Teams Info
-    trade_teams = load_trade_teams(season, teams)
+    trade_teams = load_trade_teams(season, teams, league)
 
     # Determine which teams are classified as a "Tax Paying Team"
-    determine_tax_paying_teams("2019-20", trade_teams)
+    determine_tax_paying_teams(season, trade_teams, league)
 
     # Create copy of trade teams before trade is procssed
     pre_trade_teams = copy.deepcopy(trade_teams)
 
+    # Check the trade against the season's CBA rules (imported here: both modules build on this one)
+    from constraints import compile_rules
+    from trade_screening import LeagueMatrix
+
+    matrix = LeagueMatrix.from_trade_teams(trade_teams)
+    proposal = {"players": players, "src": src_teams, "dest": dest_teams}
+    verdict = compile_rules(season).check(matrix, [proposal])[0]
+
     # Process Trade
-    trade_players_to_teams = swap_trade_team_players(trade_teams, players, dest_teams)
-    post_trade_teams = process_simultaneous_trade(trade_players_to_teams, trade_teams, teams)
+    swap_trade_team_players(trade_teams, players, dest_teams)
+    post_trade_teams = process_simultaneous_trade(verdict, trade_teams)
 
-    return tuple(pre_trade_teams, post_trade_teams)
+    return pre_trade_teams, post_trade_teams
 
 
-def load_trade_teams(season: str, teams: list) -> dict:
+def load_trade_teams(season: str, teams: list, league: LeagueStore = None) -> dict:
     """Load trade teams.
 
     Parameters:
         season (str): Season year.
         teams (list): List of team names.
+        league (LeagueStore): League tables to read from. Defaults to the database.
 
     Returns:
         dict: Trade teams info.
     """
+    league = league or LeagueStore()
 
-    sql_table_df  = financialDB.read("Players", "Payroll{}".format(season)) # TODO
-
-    season  = "2020-21" # TODO: MAKE GLOBAL VARIABLE
-    seasons = get_future_seasons(currentSeason=int(season[:4]), futureSeason=int(season[-2:]))[1:5]
-
-    for season in seasons:
-        # TODO: Make into functions in utils.py
-        sql_table_df[season] = sql_table_df[season].map(lambda x: x.replace(",", "").replace("$", ""))
-        sql_table_df[season] = [ 0 if contract == '' else contract for contract in sql_table_df[season] ]
-        sql_table_df[season] = sql_table_df[season].astype(int)
+    sql_table_df = league.payroll(season)
+    seasons = [column for column in league.contract_seasons(season) if column in sql_table_df.columns]
 
     trade_teams = dict()
     for team in teams:
@@ -102,21 +117,21 @@ def load_trade_teams(season: str, teams: list) -> dict:
         # Store contract to player
         for index, row in players_seasons_df.iterrows():
             trade_teams[team].players[row['Player']] = list()
-            for season in seasons:
-                if row[season] > 0:
-                    trade_teams[team].players[row['Player']].append(row[season])
+            for contract_season in seasons:
+                if row[contract_season] > 0:
+                    trade_teams[team].players[row['Player']].append(row[contract_season])
 
             # Remove player if there is no data
             if len(trade_teams[team].players[row['Player']]) == 0:
                 trade_teams[team].players.pop(row['Player'], None)
 
     # Draft Info
-    get_draft_picks(trade_teams)
+    get_draft_picks(trade_teams, league, season)
 
     return trade_teams
 
 
-def get_draft_picks(trade_teams: dict) -> None:
+def get_draft_picks(trade_teams: dict, league: LeagueStore = None, season: str = None) -> None:
     """Retrieve draft picks information for trade teams from a SQL table.
 
     This function retrieves draft pick information for each trade team from a SQL table
@@ -125,9 +140,16 @@ def get_draft_picks(trade_teams: dict) -> None:
 
     Args:
         trade_teams (dict): Dictionary containing trade team objects.
+        league (LeagueStore): League tables to read from. Defaults to the database.
+        season (str): Only keep picks from the draft that ends this season onwards. Defaults to every pick.
     """
+    league = league or LeagueStore()
+
     # Read draft pick information from the SQL table into a DataFrame
-    sql_table_df  = draftDB.read("Draft", "FuturePicks")
+    if season:
+        sql_table_df = league.picks(season)
+    else:
+        sql_table_df = league.read(draftDB, "Draft", "FuturePicks")
 
     # Iterate over each row in the filtered DataFrame.
     # Create a DraftInfo object and append it to the team's draft picks list.
@@ -136,27 +158,36 @@ def get_draft_picks(trade_teams: dict) -> None:
             trade_teams[team].draftPicks.append(DraftInfo(row["Season"], row["Round"], row["PickInfo"]))
 
 
-def determine_tax_paying_teams(season: str, trade_teams: dict) -> None:
-    """Determine tax paying teams.
+def determine_tax_paying_teams(season: str, trade_teams: dict, league: LeagueStore = None) -> None:
+    """Determine tax paying teams, and load each team's payroll and exception usage from the cap overview.
 
     Parameters:
         season (str): Season year.
         trade_teams (dict): Trade teams info.
+        league (LeagueStore): League tables to read from. Defaults to the database.
     """
+    league = league or LeagueStore()
 
-    # Important Numbers (Need to move)
-    salay_cap_min = 109140000    # 2019-21 Seasons
-    luxury_tax   = 132627000    # 2019-21 Seasons
+    luxury_tax   = league.constants(season)["luxury_tax"]
+    sql_table_df = league.cap_overview(season)
 
-    sql_table_df = financialDB.read("Teams", "SalaryCapOverview{}".format(season))
+    for team, data in trade_teams.items():
+        team_row = sql_table_df.loc[sql_table_df.Team == team]
 
-    sql_table_df[season] = sql_table_df[season].map(lambda x: x.replace(",", "").replace("$", ""))
-    sql_table_df[season] = sql_table_df[season].astype(int)
+        # Teams missing from the cap overview keep their defaults
+        if team_row.empty:
+            continue
 
-    for team, data in trade_teams.items():
-        if int(sql_table_df[season].loc[sql_table_df.Team == team]) > luxury_tax:
+        data.payroll = int(team_row[season].iloc[0])
+        if data.payroll > luxury_tax:
             data.taxPaying = True
 
+        # Exception usage decides whether the team is hard-capped at the tax apron
+        if utils.MID_LEVEL_EXCEPTION_USED in team_row.columns:
+            data.midLevelExceptionUsed = int(team_row[utils.MID_LEVEL_EXCEPTION_USED].iloc[0])
+        if utils.BI_ANNUAL_EXCEPTION_USED in team_row.columns:
+            data.biAnnualExceptionUsed = int(team_row[utils.BI_ANNUAL_EXCEPTION_USED].iloc[0])
+
 
 def swap_trade_team_players(trade_teams: dict, players: list, dest_teams: list) -> dict:
     """Swap trade team players to their new team.
@@ -192,35 +223,38 @@ def swap_trade_team_players(trade_teams: dict, players: list, dest_teams: list)
     return trade_players_to_teams
 
 
-def process_simultaneous_trade(trade_players_to_teams: dict, trade_teams: dict, teams: list) -> dict:
+def process_simultaneous_trade(verdict: dict, trade_teams: dict) -> dict:
     """Process simultaneous trade.
 
     Parameters:
-        trade_players_to_teams (dict): Trade players to teams mapping.
+        verdict (dict): Result of constraints.ConstraintSet.check for the trade.
         trade_teams (dict): Trade teams info.
-        teams (list): List of team names.
 
     Returns:
         dict: Post-trade teams info.
 
     Raises:
-        SystemExit: If the trade cannot be processed due to salary limit constraints.
+        SystemExit: If the trade breaks a CBA rule (salary matching, roster size, hard cap, ...).
     """
-    contracts_totals = [sum(list(trade_player.values())[0][0] for trade_player in trade_players_to_teams[team]) for team in trade_teams]
-
-    team1_successful = contracts_totals[0] < trade_teams[teams[1]].salaryLimit
-    team2_successful = contracts_totals[1] < trade_teams[teams[0]].salaryLimit
-
-    if team1_successful and team2_successful:
+    if verdict["legal"]:
         print("Trade Successful.")
         return trade_teams
-    elif not team1_successful:
-        report_error(teams[1], trade_teams[teams[1]].salaryLimit, contracts_totals[0])
-    elif not team2_successful:
-        report_error(teams[0], trade_teams[teams[0]].salaryLimit, contracts_totals[1])
 
+    limits = {team["team"]: team for team in verdict["teams"]}
 
-def evaluate_non_tax_paying_team_limit(trade_players_contracts_total: float) -> float:
+    error_messages = list(verdict["errors"])
+    for violation in verdict["violations"]:
+        team = limits[violation["team"]]
+        if violation["rule"] == "salary_matching":
+            error_messages.append(f"{team['team']} can only take up to ${team['limit']:,.2f}. "
+                                  f"Cannot take contract ${team['incoming']:,.2f}.")
+        else:
+            error_messages.append(f"{team['team']}: {violation['message']}")
+
+    report_errors(error_messages)
+
+
+def evaluate_non_tax_paying_team_limit(trade_players_contracts_total: float, verbose: bool = True) -> float:
     """Evaluate salary limit for non-taxpaying team.
     
     In a simultaneous trade a NON-TAXPAYING team can trade one or more players and take back...
@@ -230,30 +264,34 @@ def evaluate_non_tax_paying_team_limit(trade_players_contracts_total: float) ->
 
     Parameters:
         trade_players_contracts_total (float): Total contracts sum.
+        verbose (bool): Print which salary tier the trade falls into.
 
     Returns:
         float: Salary limit.
     """
-    min_salary          = 6533333
-    min_trade_pct       = 1.75
-    min_salary_addition = 100000
+    min_salary          = NON_TAX_MIN_SALARY
+    min_trade_pct       = NON_TAX_MIN_TRADE_PCT
+    min_salary_addition = TRADE_SALARY_ADDITION
 
-    mid_salary_addition = 5000000000
+    mid_salary_addition = NON_TAX_MID_SALARY_ADDITION
 
-    max_salary          = 19600000
-    max_trade_pct       = 1.25
-    max_salary_addition = 100000
+    max_salary          = NON_TAX_MAX_SALARY
+    max_trade_pct       = TRADE_PCT
+    max_salary_addition = TRADE_SALARY_ADDITION
 
-    if trade_players_contracts_total in range(0, min_salary):
-        print("Min Trade Contract")
+    if 0 <= trade_players_contracts_total < min_salary:
+        if verbose:
+            print("Min Trade Contract")
         return (trade_players_contracts_total * min_trade_pct) + min_salary_addition
 
-    elif trade_players_contracts_total in range(min_salary, max_salary):
-        print("Mid-Level Trade Contract")
+    elif min_salary <= trade_players_contracts_total <= max_salary:
+        if verbose:
+            print("Mid-Level Trade Contract")
         return trade_players_contracts_total + mid_salary_addition
 
     elif trade_players_contracts_total > max_salary:
-        print("Max Trade Contract")
+        if verbose:
+            print("Max Trade Contract")
         return (trade_players_contracts_total * max_trade_pct) + max_salary_addition
 
     else:
@@ -269,11 +307,27 @@ def evaluate_tax_paying_team_limit(trade_players_contracts_total: float) -> floa
     Returns:
         float: Salary limit.
     """
-    trade_pct = 1.25
-    salary_addition = 100000
+    trade_pct = TRADE_PCT
+    salary_addition = TRADE_SALARY_ADDITION
     return (trade_players_contracts_total * trade_pct) + salary_addition
 
 
+def salary_matching_limit(trade_players_contracts_total: float, tax_paying: bool) -> float:
+    """Returns the most salary a team can take back in a simultaneous trade without printing.
+
+    Parameters:
+        trade_players_contracts_total (float): Total outgoing contracts sum.
+        tax_paying (bool): Whether the team is a tax paying team.
+
+    Returns:
+        float: Salary limit.
+    """
+    if tax_paying:
+        return evaluate_tax_paying_team_limit(trade_players_contracts_total)
+
+    return evaluate_non_tax_paying_team_limit(trade_players_contracts_total, verbose=False)
+
+
 def process_non_simultaneous_trade(trade_team: Team, teams: list) -> None:
     """Process non-simultaneous trade.
 